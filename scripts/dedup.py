@@ -0,0 +1,212 @@
+"""
+Djinni.co near-duplicate postings — MinHash signatures + LSH banding
+────────────────────────────────────────────────────────────────────
+Companies re-post the same role under new URLs, which URL/id dedup cannot
+see. This stage finds those re-posts without pairwise comparison:
+
+  1. shingle each posting (word 3-grams of company + title + description)
+  2. MinHash signatures, computed for all postings at once with numpy
+  3. LSH: split signatures into bands; postings sharing any band bucket
+     become candidates
+  4. candidates are confirmed against the bucket's first member (same
+     company, estimated Jaccard ≥ threshold) and merged with union-find
+
+Work is O(rows × bands), so hundreds of thousands of rows are fine.
+
+Output: data/djinni_dups.csv — one row per posting:
+  url, dup_cluster (job id of the oldest posting in the cluster),
+  cluster_size, is_canonical
+
+Usage:
+  python scripts/dedup.py
+  python scripts/dedup.py --threshold 0.7
+"""
+
+from __future__ import annotations
+
+import argparse
+import re
+import zlib
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from djinni_schema import job_id
+
+ROOT      = Path(__file__).parent.parent
+DATA_PATH = ROOT / "data" / "djinni.csv"
+DUPS_PATH = ROOT / "data" / "djinni_dups.csv"
+
+NUM_PERM  = 128            # MinHash signature length
+BANDS     = 16             # LSH bands × rows = NUM_PERM
+ROWS      = NUM_PERM // BANDS
+SHINGLE_K = 3              # words per shingle
+THRESHOLD = 0.8            # estimated Jaccard to call two postings duplicates
+CHUNK     = 8_192          # shingles hashed per batch: NUM_PERM × CHUNK × 8 B = 8 MB, cache-sized
+
+_WORD_RE = re.compile(r"\w+")
+_MIX     = np.uint64(0x9E3779B97F4A7C15)   # odd constant folding word hashes into k-grams
+
+_rng    = np.random.default_rng(0x5EED)
+_PERM_A = _rng.integers(0, 1 << 63, NUM_PERM, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+_PERM_B = _rng.integers(0, 1 << 63, NUM_PERM, dtype=np.uint64)
+
+
+def shingle_hashes(texts: list[str], k: int = SHINGLE_K) -> tuple[np.ndarray, np.ndarray]:
+    """
+    64-bit hashes of the word k-grams of every text, flattened, plus each
+    text's start offset into them. A text shorter than k words is padded
+    with empty words, so it yields one shingle of all its words. Repeated
+    k-grams are kept: they do not change a minimum.
+    """
+    if not texts:
+        return np.empty(0, dtype=np.uint64), np.empty(0, dtype=np.int64)
+    pad = np.zeros(k, dtype=np.uint64)
+    # Only one uint64 per word outlives the loop — no str or set per shingle
+    words = []
+    for t in texts:
+        w = np.fromiter(map(zlib.crc32, map(str.encode, _WORD_RE.findall(t.lower()))), dtype=np.uint64)
+        words.append(w if len(w) >= k else np.concatenate((w, pad[:k - len(w)])))
+    n_words = np.fromiter((len(w) for w in words), dtype=np.int64, count=len(words))
+    flat    = np.concatenate(words)
+    del words
+
+    # k-gram hash at every word position, from shifted views of `flat`
+    n      = len(flat) - k + 1
+    hashes = flat[:n] * _MIX
+    for j in range(1, k):
+        hashes += flat[j:j + n]
+        if j < k - 1:
+            hashes *= _MIX
+    # Drop the k - 1 positions at the end of each text, which run into the next one
+    keep = np.ones(len(flat), dtype=bool)
+    ends = np.cumsum(n_words)
+    for j in range(1, k):
+        keep[ends - j] = False
+    hashes = hashes[keep[:n]]
+
+    n_shingles = n_words - k + 1
+    starts     = np.concatenate(([0], np.cumsum(n_shingles)[:-1]))
+    return hashes, starts
+
+
+def minhash_signatures(hashes: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    """
+    (len(starts), NUM_PERM) uint32 MinHash matrix over shingle_hashes() output.
+
+    Permutation i is the multiply-shift hash (a_i·x + b_i mod 2^64) >> 32,
+    computed in place per chunk of ~CHUNK shingles; per-text minima come
+    from reduceat over the text offsets.
+    """
+    n       = len(starts)
+    lengths = np.diff(np.append(starts, len(hashes)))
+    sigs    = np.empty((n, NUM_PERM), dtype=np.uint32)
+    buf     = np.empty((NUM_PERM, CHUNK), dtype=np.uint64)
+
+    doc = 0
+    while doc < n:
+        # Take whole texts until the chunk holds ~CHUNK shingles
+        end = int(np.searchsorted(starts, starts[doc] + CHUNK, side="right"))
+        end = max(end, doc + 1)
+        lo, hi = starts[doc], starts[end - 1] + lengths[end - 1]
+        hashed = buf[:, :hi - lo] if hi - lo <= CHUNK else np.empty((NUM_PERM, hi - lo), np.uint64)
+        np.multiply(_PERM_A[:, None], hashes[None, lo:hi], out=hashed)
+        hashed += _PERM_B[:, None]
+        hashed >>= np.uint64(32)
+        sigs[doc:end] = np.minimum.reduceat(hashed, starts[doc:end] - lo, axis=1).T
+        doc = end
+    return sigs
+
+
+class _UnionFind:
+    def __init__(self, n: int) -> None:
+        self.parent = list(range(n))
+
+    def find(self, i: int) -> int:
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, i: int, j: int) -> None:
+        ri, rj = self.find(i), self.find(j)
+        if ri != rj:
+            self.parent[max(ri, rj)] = min(ri, rj)
+
+
+def lsh_clusters(
+    sigs: np.ndarray,
+    groups: np.ndarray,
+    threshold: float = THRESHOLD,
+) -> np.ndarray:
+    """
+    Cluster label per row (the smallest row index in its cluster).
+
+    Rows only merge when they share an LSH bucket, belong to the same
+    `groups` value (company) and their signatures agree on ≥ threshold
+    of positions.
+    """
+    uf = _UnionFind(len(sigs))
+    for band in range(BANDS):
+        block = np.ascontiguousarray(sigs[:, band * ROWS:(band + 1) * ROWS])
+        keys  = block.view(np.dtype((np.void, block.dtype.itemsize * ROWS))).ravel()
+        _, bucket, counts = np.unique(keys, return_inverse=True, return_counts=True)
+        shared = counts[bucket] > 1
+        if not shared.any():
+            continue
+        rows  = np.flatnonzero(shared)
+        order = rows[np.argsort(bucket[rows], kind="stable")]
+        b     = bucket[order]
+        # Compare each bucket member with the bucket's first member
+        is_first = np.r_[True, b[1:] != b[:-1]]
+        first_of = order[np.maximum.accumulate(np.where(is_first, np.arange(len(order)), 0))]
+        cand  = order != first_of
+        left, right = first_of[cand], order[cand]
+        same  = groups[left] == groups[right]
+        left, right = left[same], right[same]
+        agree = (sigs[left] == sigs[right]).mean(axis=1) >= threshold
+        for i, j in zip(left[agree].tolist(), right[agree].tolist()):
+            uf.union(i, j)
+    return np.fromiter((uf.find(i) for i in range(len(sigs))), dtype=np.int64, count=len(sigs))
+
+
+def find_duplicates(df: pd.DataFrame, threshold: float = THRESHOLD) -> pd.DataFrame:
+    """Tag near-duplicate postings in a djinni.csv frame (see module docstring)."""
+    text = (df["company"].fillna("") + " " + df["title"].fillna("") + " "
+            + df["description"].fillna(""))
+    sigs = minhash_signatures(*shingle_hashes(text.tolist()))
+    company = df["company"].fillna("").str.lower().to_numpy()
+    labels  = lsh_clusters(sigs, company, threshold)
+
+    ids = df["url"].map(lambda u: job_id(u) or 0).to_numpy()
+    out = pd.DataFrame({"url": df["url"], "_label": labels, "_id": ids})
+    # Canonical posting = oldest (smallest job id) in each cluster
+    out["dup_cluster"]  = out.groupby("_label")["_id"].transform("min")
+    out["cluster_size"] = out.groupby("_label")["_id"].transform("size")
+    out["is_canonical"] = out["_id"] == out["dup_cluster"]
+    return out.drop(columns=["_label", "_id"])
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Tag near-duplicate job postings")
+    ap.add_argument("--threshold", type=float, default=THRESHOLD,
+                    help="estimated Jaccard similarity to treat as duplicate")
+    args = ap.parse_args()
+
+    df = pd.read_csv(DATA_PATH, dtype=str, keep_default_na=False)
+    df = df.drop_duplicates(subset="url")
+    print(f"Loaded {len(df):,} postings")
+
+    dups = find_duplicates(df, args.threshold)
+    dups.to_csv(DUPS_PATH, index=False)
+
+    n_dup = int((~dups["is_canonical"]).sum())
+    n_clusters = int((dups.loc[dups["cluster_size"] > 1, "dup_cluster"]).nunique())
+    print(f"  {n_clusters:,} duplicate clusters, {n_dup:,} redundant postings")
+    print(f"  Distinct postings: {len(dups) - n_dup:,}")
+    print(f"Saved {DUPS_PATH}")
+
+
+if __name__ == "__main__":
+    main()
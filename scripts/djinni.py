@@ -3,13 +3,30 @@ Djinni.co async job scraper
 ────────────────────────────────────────────────────────────────────
 Features
   • asyncio + aiohttp — concurrent fetching (configurable concurrency)
-  • Two-pass scrape: listing pages → detail pages
+  • Two-pass scrape: listing pages → detail pages (priority-ordered, budgeted)
   • Rich field extraction: JSON-LD + HTML fallback on detail pages
   • Crash-proof: incremental CSV append, JSON checkpoint, SIGINT/SIGTERM
   • Automatic retries with exponential back-off + jitter
   • Resumable: skips already-scraped job URLs on restart
   • Rate-limited via asyncio.Semaphore
+  • Pooled keep-alive connections, br/gzip, DNS cache; optional HTTP/2 (djinni_http.py)
   • Progress bar via tqdm
+  • Run-stamped, day-partitioned snapshots for trend analysis (snapshots.py)
+  • Skill / keyword inverted index with a query CLI (skill_index.py)
+  • Compressed raw-HTML archive for offline re-parsing (html_archive.py)
+
+Library use — an async generator that yields JobRecords as they finish,
+with backpressure (a slow consumer pauses fetching):
+
+    from djinni import CsvSink, ScrapeConfig, stream_jobs
+
+    config = ScrapeConfig(concurrency=2, sinks=[CsvSink(Path("jobs.csv"))])
+    async for job in stream_jobs(config):
+        ...
+
+Importing this module is cheap and side-effect free: aiohttp/httpx, tqdm
+and python-dotenv are imported on use, and logging, .env loading and signal
+handlers are set up by main(). Parsers live in djinni_parsers.py.
 """
 
 from __future__ import annotations
@@ -20,49 +37,44 @@ import json
 import logging
 import os
 import random
-import re
 import signal
 import sys
-import time
+from contextlib import suppress
+from dataclasses import dataclass, field
+from datetime import date
 from pathlib import Path
-from typing import Any
-
-import aiohttp
-from bs4 import BeautifulSoup
-from dotenv import load_dotenv
-from tqdm.asyncio import tqdm
-from yarl import URL as YarlURL
+from typing import AsyncIterator, Container, Protocol
 
-# Load .env file if present (overrides are ignored — shell env takes priority)
-load_dotenv(dotenv_path=Path(__file__).parent.parent / ".env", override=False)
+from djinni_http import HTTPStatusError, Transport, is_block_page, make_transport
+from djinni_parsers import parse_detail_page, parse_listing_page
+from djinni_priority import DetailQueue
+from djinni_schema import (
+    BASE_URL, CSV_FIELDS, JOBS_URL, LISTING_FIELDS, JobIdSet, JobRecord, job_id,
+)
+from html_archive import ARCHIVE_DIR, HtmlArchive
+from salary import load_fx_rates, normalize_record
+from skill_index import INDEX_PATH, SkillIndex
+from snapshots import SNAPSHOT_PATH, SnapshotStore, detail_history, recent_rows
 
 # ── Config ────────────────────────────────────────────────────────────────────
-BASE_URL        = "https://djinni.co"
-JOBS_URL        = f"{BASE_URL}/jobs/"
 CONCURRENCY     = 3          # parallel HTTP requests (low to avoid IP block)
 MAX_RETRIES     = 5          # retries per URL
 BACKOFF_BASE    = 2.0        # seconds (doubles each retry + jitter)
 REQUEST_TIMEOUT = 25         # seconds per request
 MIN_DELAY       = 1.0        # seconds between requests per worker
+DETAIL_BUDGET   = 0          # detail-page HTTP requests per run, retries included
+                             # (0 = listing-only); overridden by DJINNI_DETAIL_BUDGET
 OUTPUT_PATH     = Path(__file__).parent.parent / "data" / "djinni.csv"
 CHECKPOINT_PATH = Path(__file__).parent.parent / "data" / ".djinni_checkpoint.json"
+MERGE_EVERY     = 200        # CsvSink: merge pending updates into the CSV every N rows
 # Optional: path to a Netscape-format cookies file exported from your browser
 # (Export with "Cookie-Editor" extension → Export → Netscape format → save as data/cookies.txt)
 COOKIES_FILE    = Path(__file__).parent.parent / "data" / "cookies.txt"
-
-HEADERS = {
-    "User-Agent": (
-        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
-        "AppleWebKit/537.36 (KHTML, like Gecko) "
-        "Chrome/122.0.0.0 Safari/537.36"
-    ),
-    "Accept-Language": "en-US,en;q=0.9",
-    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-    "Referer": "https://djinni.co/",
-    "Connection": "keep-alive",
-    "Upgrade-Insecure-Requests": "1",
-}
-
+LOG_PATH        = Path(__file__).parent.parent / "data" / "djinni_scraper.log"
+ENV_PATH        = Path(__file__).parent.parent / ".env"
+# "aiohttp" or "httpx" (HTTP/2, needs `pip install httpx[http2]`);
+# overridden by the DJINNI_HTTP_BACKEND env var
+HTTP_BACKEND    = "aiohttp"
 
 def load_cookies() -> dict[str, str]:
     """
@@ -104,128 +116,227 @@ def load_cookies() -> dict[str, str]:
     )
     return {}
 
-# All CSV columns
-CSV_FIELDS = [
-    # ── from listing page (JSON-LD) ──────────────────────────────────────
-    "title",
-    "company",
-    "url",
-    "salary_min",
-    "salary_max",
-    "salary_currency",
-    "job_type",           # FULL_TIME / PART_TIME / CONTRACTOR …
-    "category",           # e.g. Python, React.js
-    "date_posted",
-    "location_type",      # TELECOMMUTE / INPERSON
-    "location_regions",   # e.g. Ukraine, Worldwide
-    "experience_months",
-    # ── from detail page (HTML) ──────────────────────────────────────────
-    "english_level",      # e.g. Upper Intermediate
-    "experience_years",   # e.g. 3 years
-    "work_format",        # Remote / Office / Hybrid
-    "city",
-    "country",
-    "domain",             # e.g. FinTech, Healthcare
-    "company_type",       # e.g. Product / Outsource / Startup
-    "company_size",       # e.g. 51-200
-    "views",
-    "applications",
-    "skills",             # comma-separated tags
-    "description",        # full plain-text description
-]
 
 # ── Logging ───────────────────────────────────────────────────────────────────
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(message)s",
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-        logging.FileHandler(
-            Path(__file__).parent.parent / "data" / "djinni_scraper.log",
-            encoding="utf-8",
-        ),
-    ],
-)
 log = logging.getLogger(__name__)
 
+
+def setup_logging() -> None:
+    """Log to stdout and LOG_PATH. Called by main(), never at import time."""
+    LOG_PATH.parent.mkdir(parents=True, exist_ok=True)
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(message)s",
+        handlers=[
+            logging.StreamHandler(sys.stdout),
+            logging.FileHandler(LOG_PATH, encoding="utf-8"),
+        ],
+    )
+
+
 # ── Checkpoint helpers ────────────────────────────────────────────────────────
 
-def load_checkpoint() -> dict:
-    if CHECKPOINT_PATH.exists():
+def load_checkpoint(path: Path = CHECKPOINT_PATH) -> tuple[JobIdSet, int]:
+    """Returns (seen jobs, last page). Accepts the older id- and URL-list formats too."""
+    if path.exists():
         try:
-            return json.loads(CHECKPOINT_PATH.read_text(encoding="utf-8"))
+            ckpt = json.loads(path.read_text(encoding="utf-8"))
+            if "done_bitmap" in ckpt:
+                done = JobIdSet.from_bitmap(
+                    ckpt["done_bitmap"], ckpt.get("done_big", []), ckpt.get("done_urls", [])
+                )
+            else:
+                done = JobIdSet(urls=ckpt.get("done_urls", []), ids=ckpt.get("done_ids", []))
+            return done, ckpt.get("last_page", 0)
         except Exception:
             pass
-    return {"done_urls": [], "last_page": 0}
-
-
-def save_checkpoint(done_urls: set[str], last_page: int) -> None:
-    CHECKPOINT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    CHECKPOINT_PATH.write_text(
-        json.dumps({"done_urls": list(done_urls), "last_page": last_page}, ensure_ascii=False),
+    return JobIdSet(), 0
+
+
+def save_checkpoint(done: JobIdSet, last_page: int, path: Path = CHECKPOINT_PATH) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(
+        json.dumps(
+            {
+                "done_bitmap": done.bitmap(),
+                "done_big": done.big_ids(),
+                "done_urls": done.other_urls(),
+                "last_page": last_page,
+            },
+            ensure_ascii=False,
+        ),
         encoding="utf-8",
     )
 
 
-# ── CSV helpers ───────────────────────────────────────────────────────────────
+# ── Sinks ─────────────────────────────────────────────────────────────────────
+
+class Sink(Protocol):
+    """
+    Anything stream_jobs() can hand finished rows to (one batch per page).
+
+    write() gets each job once, as the consumer does. A sink may also define
+    observe(rows) to be told about listing rows it was not given because an
+    earlier, checkpointed part of the run already had them — SnapshotStore
+    does, so a day partition counts every listing seen that day.
+    """
+
+    def write(self, rows: list[JobRecord]) -> None: ...
+    def close(self) -> None: ...
+
 
-def init_csv() -> None:
-    OUTPUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    if not OUTPUT_PATH.exists():
-        with open(OUTPUT_PATH, "w", newline="", encoding="utf-8") as f:
-            csv.DictWriter(f, fieldnames=CSV_FIELDS).writeheader()
+class CsvSink:
+    """
+    Incremental CSV output. Jobs not yet in the file are appended as they
+    arrive; rows for jobs already there (detail-enriched, or re-listed
+    after a finished run) are merged into the existing row every
+    `merge_every` updates and on close() — non-empty new values win, like
+    SnapshotStore. Each merge rewrites the file, so a crash loses at most
+    the last `merge_every` updates. With replace=True they overwrite the
+    stored row instead (html_archive.py reparse): all of it if the URL is
+    in `detailed` (or `detailed` is None), else only its LISTING_FIELDS.
+    """
 
+    def __init__(
+        self,
+        path: Path = OUTPUT_PATH,
+        *,
+        replace: bool = False,
+        detailed: Container[str] | None = None,
+        merge_every: int = MERGE_EVERY,
+    ) -> None:
+        self.path        = path
+        self.replace     = replace
+        self.detailed    = detailed
+        self.merge_every = merge_every
+        self._written    = JobIdSet()
+        self._pending: dict[int | str, JobRecord] = {}     # by job id, like _written
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if not path.exists():
+            with open(path, "w", newline="", encoding="utf-8") as f:
+                csv.DictWriter(f, fieldnames=CSV_FIELDS).writeheader()
+            return
 
-def append_rows(rows: list[dict]) -> None:
-    if not rows:
-        return
-    with open(OUTPUT_PATH, "a", newline="", encoding="utf-8") as f:
-        w = csv.DictWriter(f, fieldnames=CSV_FIELDS, extrasaction="ignore")
-        w.writerows(rows)
+        with open(path, newline="", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            header = reader.fieldnames or []
+            for row in reader:
+                self._written.add(row["url"])
+        # Older CSVs lack columns added to CSV_FIELDS since — rewrite with the new header
+        if header != CSV_FIELDS:
+            log.info("Upgrading %s to %d columns", path, len(CSV_FIELDS))
+            self._rewrite({})
+
+    def write(self, rows: list[JobRecord]) -> None:
+        new = []
+        for r in rows:
+            if r.url in self._written:
+                self._pending[job_id(r.url) or r.url] = r
+            else:
+                self._written.add(r.url)
+                new.append(r)
+        if new:
+            with open(self.path, "a", newline="", encoding="utf-8") as f:
+                w = csv.DictWriter(f, fieldnames=CSV_FIELDS, extrasaction="ignore")
+                w.writerows(new)
+        if len(self._pending) >= self.merge_every:
+            self.flush()
+
+    def flush(self) -> None:
+        """Merge pending updates into the file now."""
+        if self._pending:
+            self._rewrite(self._pending)
+            log.info("Merged %d updated rows into %s", len(self._pending), self.path)
+            self._pending = {}
+
+    def _rewrite(self, updates: dict[int | str, JobRecord]) -> None:
+        """Rewrite the CSV with `updates` merged into (or replacing) their rows, header = CSV_FIELDS."""
+        tmp = self.path.with_suffix(".csv.tmp")
+        with open(self.path, newline="", encoding="utf-8") as src, \
+             open(tmp, "w", newline="", encoding="utf-8") as dst:
+            w = csv.DictWriter(dst, fieldnames=CSV_FIELDS, extrasaction="ignore")
+            w.writeheader()
+            for row in csv.DictReader(src):
+                # By job id, so a re-slugged URL still finds its row
+                upd = updates.get(job_id(row["url"]) or row["url"])
+                if upd is not None and self.replace:
+                    if self.detailed is None or upd.url in self.detailed:
+                        row = upd.as_dict()
+                    else:
+                        row.update((f, upd[f]) for f in LISTING_FIELDS)
+                elif upd is not None:
+                    row.update((k, v) for k, v in upd.as_dict().items() if v not in (None, ""))
+                w.writerow(row)
+        tmp.replace(self.path)
+
+    def close(self) -> None:
+        self.flush()
 
 
 # ── HTTP helpers ──────────────────────────────────────────────────────────────
 
+class RequestBudget:
+    """HTTP attempts left for a pass; fetch() spends one per attempt, retries included."""
+
+    __slots__ = ("left",)
+
+    def __init__(self, left: int) -> None:
+        self.left = left
+
+    def take(self) -> bool:
+        if self.left <= 0:
+            return False
+        self.left -= 1
+        return True
+
+
 async def fetch(
-    session: aiohttp.ClientSession,
+    client: Transport,
     url: str,
     sem: asyncio.Semaphore,
     *,
     retries: int = MAX_RETRIES,
+    archive: HtmlArchive | None = None,
+    budget: RequestBudget | None = None,
 ) -> str | None:
-    """Fetch URL with retries, back-off, and semaphore-based rate limiting."""
+    """
+    Fetch URL with retries, back-off, and semaphore-based rate limiting.
+    Successful bodies are also stored in `archive` when one is given.
+    With a `budget`, every attempt spends one request and fetch() gives
+    up (returns None) once it is exhausted.
+    """
     async with sem:
         for attempt in range(1, retries + 1):
+            if budget is not None and not budget.take():
+                return None
             try:
                 await asyncio.sleep(MIN_DELAY + random.uniform(0, 0.5))
-                async with session.get(
-                    url,
-                    headers=HEADERS,
-                    timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT),
-                    allow_redirects=True,
-                ) as resp:
-                    if resp.status == 429:
-                        wait = BACKOFF_BASE ** attempt + random.uniform(2, 5)
-                        log.warning("429 rate-limit on %s — waiting %.1fs", url, wait)
-                        await asyncio.sleep(wait)
-                        continue
-                    if resp.status == 403:
-                        wait = BACKOFF_BASE ** attempt + random.uniform(2, 5)
-                        log.warning("403 on %s — waiting %.1fs", url, wait)
-                        await asyncio.sleep(wait)
-                        continue
-                    if resp.status == 404:
-                        return None
-                    resp.raise_for_status()
-                    text = await resp.text(encoding="utf-8", errors="replace")
-                    # Detect IP block page (short response with "blocked" message)
-                    if len(text) < 500 and "blocked" in text.lower():
-                        wait = 30 + random.uniform(5, 15)
-                        log.warning("IP BLOCKED on %s — waiting %.0fs before retry", url, wait)
-                        await asyncio.sleep(wait)
-                        continue
-                    return text
-            except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+                status, body = await client.get(url)
+                if status == 429:
+                    wait = BACKOFF_BASE ** attempt + random.uniform(2, 5)
+                    log.warning("429 rate-limit on %s — waiting %.1fs", url, wait)
+                    await asyncio.sleep(wait)
+                    continue
+                if status == 403:
+                    wait = BACKOFF_BASE ** attempt + random.uniform(2, 5)
+                    log.warning("403 on %s — waiting %.1fs", url, wait)
+                    await asyncio.sleep(wait)
+                    continue
+                if status == 404:
+                    return None
+                if status >= 400:
+                    raise HTTPStatusError(status, url)
+                # Detect IP block page on raw bytes before decoding
+                if is_block_page(body):
+                    wait = 30 + random.uniform(5, 15)
+                    log.warning("IP BLOCKED on %s — waiting %.0fs before retry", url, wait)
+                    await asyncio.sleep(wait)
+                    continue
+                if archive is not None:
+                    archive.add(url, body)
+                return body.decode("utf-8", errors="replace")
+            except (*client.errors, asyncio.TimeoutError) as exc:
                 wait = BACKOFF_BASE ** attempt + random.uniform(0, 2)
                 log.warning(
                     "Attempt %d/%d failed for %s (%s) — retrying in %.1fs",
@@ -236,285 +347,72 @@ async def fetch(
         return None
 
 
-# ── Listing page parser ───────────────────────────────────────────────────────
+# ── Graceful shutdown ─────────────────────────────────────────────────────────
 
-def _safe_int(v: Any) -> str:
-    try:
-        return str(int(v))
-    except (TypeError, ValueError):
-        return str(v) if v else ""
+_shutdown = False
 
+def _handle_signal(sig, frame):
+    global _shutdown
+    log.warning("Signal %s received — finishing current batch then saving...", sig)
+    _shutdown = True
 
-def parse_listing_page(html: str) -> tuple[list[dict], int]:
-    """
-    Returns (list_of_job_stubs, total_pages).
-    Stubs contain all fields extractable from JSON-LD on the listing page.
-    """
-    soup = BeautifulSoup(html, "lxml")
-    jobs: list[dict] = []
 
-    for script in soup.find_all("script", type="application/ld+json"):
-        try:
-            data = json.loads(script.string or "")
-        except (json.JSONDecodeError, TypeError):
-            continue
-
-        postings: list[dict] = []
-        if isinstance(data, dict):
-            if data.get("@type") == "ItemList":
-                for item in data.get("itemListElement", []):
-                    p = item if item.get("@type") == "JobPosting" else item.get("item", {})
-                    if p.get("@type") == "JobPosting":
-                        postings.append(p)
-            elif data.get("@type") == "JobPosting":
-                postings.append(data)
-        elif isinstance(data, list):
-            postings = [d for d in data if isinstance(d, dict) and d.get("@type") == "JobPosting"]
-
-        for p in postings:
-            salary      = p.get("baseSalary", {}) or {}
-            sal_val     = salary.get("value", {}) or {}
-            org         = p.get("hiringOrganization", {}) or {}
-            exp         = p.get("experienceRequirements", {}) or {}
-            al          = p.get("applicantLocationRequirements", []) or []
-            if isinstance(al, dict):
-                al = [al]
-            regions = ", ".join(x.get("name", "") for x in al if isinstance(x, dict) and x.get("name"))
-
-            jobs.append({
-                "title":            p.get("title", ""),
-                "company":          org.get("name", "") if isinstance(org, dict) else "",
-                "url":              p.get("url", ""),
-                "salary_min":       _safe_int(sal_val.get("minValue", "")),
-                "salary_max":       _safe_int(sal_val.get("maxValue", "")),
-                "salary_currency":  salary.get("currency", "") if sal_val else "",
-                "job_type":         p.get("employmentType", ""),
-                "category":         p.get("category", ""),
-                "date_posted":      p.get("datePosted", ""),
-                "location_type":    p.get("jobLocationType", ""),
-                "location_regions": regions,
-                "experience_months": _safe_int(exp.get("monthsOfExperience", "")) if isinstance(exp, dict) else "",
-                # detail fields filled later
-                "english_level": "", "experience_years": "", "work_format": "",
-                "city": "", "country": "", "domain": "", "company_type": "",
-                "company_size": "", "views": "", "applications": "",
-                "skills": "", "description": "",
-            })
-
-    # Pagination: find max page number in pagination links
-    total_pages = 1
-    for a in soup.select("ul.pagination li a[href*='page=']"):
-        href = a.get("href", "")
-        m = re.search(r"page=(\d+)", href)
-        if m:
-            total_pages = max(total_pages, int(m.group(1)))
-
-    # Fallback: parse total count from heading
-    if total_pages == 1:
-        h = soup.find(string=re.compile(r"\d[\d\s,]+jobs?", re.I))
-        if h:
-            m = re.search(r"([\d\s,]+)", h)
-            if m:
-                n = int(m.group(1).replace(" ", "").replace(",", ""))
-                total_pages = max(1, (n + 14) // 15)
-
-    return jobs, total_pages
-
-
-# ── Detail page parser ────────────────────────────────────────────────────────
-
-def _text(el) -> str:
-    return el.get_text(" ", strip=True) if el else ""
-
-
-def parse_detail_page(html: str, stub: dict) -> dict:
-    """
-    Enrich a job stub with fields scraped from the detail page.
-    Djinni renders most meta as bare <span> tags with no CSS classes,
-    so we rely on full body-text regex + JSON-LD.
-    Returns None if the page is an IP-block response.
-    """
-    # Detect IP block / empty page
-    if len(html) < 500 and ("blocked" in html.lower() or "contact us" in html.lower()):
-        return None
+def install_signal_handlers() -> None:
+    signal.signal(signal.SIGINT,  _handle_signal)
+    signal.signal(signal.SIGTERM, _handle_signal)
 
-    soup = BeautifulSoup(html, "lxml")
-    job  = dict(stub)  # copy
 
-    # ── JSON-LD ───────────────────────────────────────────────────────────
-    for script in soup.find_all("script", type="application/ld+json"):
-        try:
-            data = json.loads(script.string or "")
-        except (json.JSONDecodeError, TypeError):
-            continue
-        if not isinstance(data, dict) or data.get("@type") != "JobPosting":
-            continue
-
-        # City & country from jobLocation
-        jp_loc = data.get("jobLocation", {}) or {}
-        addr   = jp_loc.get("address", {}) or {}
-        if isinstance(addr, dict):
-            loc = addr.get("addressLocality", "")
-            job["city"]    = job["city"]    or (loc[0] if isinstance(loc, list) else loc)
-            job["country"] = job["country"] or addr.get("addressCountry", "")
-
-        # Domain / industry — JSON-LD has explicit 'industry' key on detail pages
-        job["domain"] = job["domain"] or data.get("industry", "")
-
-        # Location regions from applicantLocationRequirements
-        if not job["location_regions"]:
-            alr = data.get("applicantLocationRequirements", [])
-            if isinstance(alr, dict):
-                alr = [alr]
-            regions: list[str] = []
-            for a in (alr or []):
-                if isinstance(a, dict):
-                    name = a.get("name", "")
-                    inner_addr = a.get("address", {}) or {}
-                    country = inner_addr.get("addressCountry", "") if isinstance(inner_addr, dict) else ""
-                    regions.append(name or country)
-            job["location_regions"] = ", ".join(r for r in regions if r)
-
-        # Full description
-        if not job["description"]:
-            raw_desc = data.get("description", "")
-            if raw_desc:
-                desc_soup = BeautifulSoup(raw_desc, "lxml")
-                job["description"] = desc_soup.get_text(" ", strip=True)[:2000]
-
-    # ── Full body text — all detail fields are bare <span> with no classes ─
-    body_text = soup.get_text(" ", strip=True)
-
-    # Views
-    m = re.search(r"(\d+)\s*views?", body_text, re.I)
-    if m:
-        job["views"] = job["views"] or m.group(1)
-
-    # Applications
-    m = re.search(r"(\d+)\s*application", body_text, re.I)
-    if m:
-        job["applications"] = job["applications"] or m.group(1)
-
-    # English level — ordered most-specific first
-    for pat, val in [
-        (r"upper[\s\-]?intermediate",  "Upper Intermediate"),
-        (r"lower[\s\-]?intermediate",  "Lower Intermediate"),
-        (r"no\s+english",              "No English"),
-        (r"c2",                        "C2 Proficient"),
-        (r"c1",                        "C1 Advanced"),
-        (r"b2",                        "B2 Upper Intermediate"),
-        (r"b1",                        "B1 Intermediate"),
-        (r"advanced",                  "Advanced"),
-        (r"fluent",                    "Fluent"),
-        (r"intermediate",              "Intermediate"),
-    ]:
-        if re.search(pat, body_text, re.I):
-            job["english_level"] = job["english_level"] or val
-            break
-
-    # Work format
-    for pat, val in [
-        (r"hybrid",       "Hybrid"),
-        (r"office\s+work","Office"),
-        (r"\boffice\b",   "Office"),
-        (r"remote\s+work","Remote"),
-        (r"\bremote\b",   "Remote"),
-    ]:
-        if re.search(pat, body_text, re.I):
-            job["work_format"] = job["work_format"] or val
-            break
-
-    # Experience years (e.g. "5 years", "3+ years")
-    m = re.search(r"(\d+)\+?\s*years?\s+of\s+exp|(\d+)\+?\s*years?\s+exp|(\d+)\s+years?\b", body_text, re.I)
-    if m:
-        yrs = next(g for g in m.groups() if g)
-        job["experience_years"] = job["experience_years"] or yrs + " years"
-
-    # Company type
-    for pat, val in [
-        (r"product\s+company", "Product"),
-        (r"outsource",         "Outsource"),
-        (r"outstaf",           "Outstaff"),
-        (r"startup",           "Startup"),
-        (r"agency",            "Agency"),
-    ]:
-        if re.search(pat, body_text, re.I):
-            job["company_type"] = job["company_type"] or val
-            break
-
-    # Company size (e.g. "51-200 employees", "200+ people")
-    m = re.search(r"(\d+[\+\-–]\d*)\s*(people|employees|specialists|engineers)?", body_text, re.I)
-    if m:
-        job["company_size"] = job["company_size"] or m.group(1).strip()
-
-    # Skills — Djinni links keywords in job descriptions / tag lists
-    if not job["skills"]:
-        skill_els = soup.select(
-            "a[href*='primary_keyword='], "
-            "a[href*='?keyword='], "
-            "a[href*='/jobs/?page=1&keywords=']"
-        )
-        if skill_els:
-            job["skills"] = ", ".join(
-                dict.fromkeys(el.get_text(strip=True) for el in skill_els if el.get_text(strip=True))
-            )
-
-    # Description fallback — look for the main content div
-    if not job["description"]:
-        for sel in [
-            "div[data-original-text]",
-            ".job-description__text",
-            ".job-description",
-            "#job-description",
-            "section.col-xs-12",
-        ]:
-            el = soup.select_one(sel)
-            if el:
-                job["description"] = el.get_text(" ", strip=True)[:2000]
-                break
-
-    # Title fallback
-    if not job["title"]:
-        h1 = soup.find("h1")
-        if h1:
-            job["title"] = _text(h1)
-
-    # Company fallback
-    if not job["company"]:
-        el = soup.select_one("a[href*='/jobs/company-']")
-        if el:
-            job["company"] = _text(el)
-
-    return job
+# ── Main orchestration ────────────────────────────────────────────────────────
 
+@dataclass
+class ScrapeConfig:
+    """Settings for one stream_jobs() run. Defaults match the CLI constants."""
 
-# ── Graceful shutdown ─────────────────────────────────────────────────────────
+    concurrency:     int   = CONCURRENCY
+    request_timeout: float = REQUEST_TIMEOUT
+    detail_budget:   int   = DETAIL_BUDGET      # detail-page HTTP requests, retries included (0 = listing-only)
+    http_backend:    str   = HTTP_BACKEND
+    # None → load_cookies() (DJINNI_COOKIES env var or COOKIES_FILE)
+    cookies:         dict[str, str] | None = None
+    # None → no resume: every job on the site is yielded
+    checkpoint_path: Path | None = None
+    sinks:           list[Sink] = field(default_factory=list)
+    # Finished records buffered ahead of the consumer before fetching pauses
+    queue_size:      int   = 100
+    progress:        bool  = False              # tqdm progress bars
+    # Raw HTML of every fetched page, for `html_archive.py reparse`; closed with the sinks
+    archive:         HtmlArchive | None = None
 
-_shutdown = False
 
-def _handle_signal(sig, frame):
-    global _shutdown
-    log.warning("Signal %s received — finishing current batch then saving...", sig)
-    _shutdown = True
+class _NoProgress:
+    """Stand-in for a tqdm bar when progress is off, so tqdm stays optional."""
 
+    def update(self, n: int = 1) -> None: ...
+    def set_postfix(self, **kw) -> None: ...
+    def close(self) -> None: ...
 
-signal.signal(signal.SIGINT,  _handle_signal)
-signal.signal(signal.SIGTERM, _handle_signal)
 
+def _progress_bar(config: ScrapeConfig, **kw):
+    if not config.progress:
+        return _NoProgress()
+    from tqdm.asyncio import tqdm
+
+    return tqdm(**kw)
 
-# ── Main orchestration ────────────────────────────────────────────────────────
 
 async def scrape_detail(
-    session: aiohttp.ClientSession,
+    client: Transport,
     sem: asyncio.Semaphore,
-    stub: dict,
-) -> dict | None:
+    stub: JobRecord,
+    archive: HtmlArchive | None = None,
+    budget: RequestBudget | None = None,
+) -> JobRecord:
     url = stub.get("url", "")
     if not url:
         return stub
     if not url.startswith("http"):
         url = BASE_URL + url
-    html = await fetch(session, url, sem)
+    html = await fetch(client, url, sem, archive=archive, budget=budget)
     if html is None:
         return stub  # return with listing-only data on permanent failure
     result = parse_detail_page(html, stub)
@@ -525,90 +423,244 @@ async def scrape_detail(
     return result
 
 
-async def main() -> None:
-    OUTPUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-
-    # Load checkpoint
-    ckpt      = load_checkpoint()
-    done_urls = set(ckpt["done_urls"])
-    last_page = ckpt["last_page"]
+async def _produce(config: ScrapeConfig, out: asyncio.Queue[JobRecord]) -> None:
+    """Listing pass, then budgeted detail pass; finished records go to `out`."""
+    ckpt_path = config.checkpoint_path
+    if ckpt_path is not None:
+        done_urls, last_page = load_checkpoint(ckpt_path)
+        if done_urls:
+            log.info("Resuming — %d jobs already scraped", len(done_urls))
+    else:
+        done_urls, last_page = JobIdSet(), 0
+
+    sinks    = config.sinks
+    snapshot = next((s for s in sinks if isinstance(s, SnapshotStore)), None)
+    if snapshot is not None:
+        log.info("Snapshot run %s → partition %s", snapshot.run_id, snapshot.table)
+    # Read before the listing pass writes, so today's partition only holds earlier runs
+    today   = snapshot.day if snapshot is not None else date.today()
+    history = detail_history(snapshot.conn, today) if snapshot is not None else {}
+
+    sem    = asyncio.Semaphore(config.concurrency)
+    client = make_transport(
+        config.http_backend,
+        concurrency=config.concurrency,
+        timeout=config.request_timeout,
+        cookies=load_cookies() if config.cookies is None else config.cookies,
+        base_url=BASE_URL,
+    )
+    details = config.detail_budget > 0
+    seen: dict[str, JobRecord] = {}      # detail-stage candidates
+    if details and last_page and snapshot is not None:
+        # A resumed run skips pages ≤ last_page; queue their jobs from the snapshot
+        seen.update(
+            (url, JobRecord(**row))
+            for url, row in recent_rows(snapshot.conn, today, done_urls).items()
+        )
+        log.info("Resume — %d stored jobs queued for details", len(seen))
+    clean = False
 
-    if done_urls:
-        log.info("Resuming — %d jobs already scraped", len(done_urls))
+    fx = load_fx_rates()
 
-    init_csv()
+    observers = [s for s in sinks if hasattr(s, "observe")]
 
-    connector       = aiohttp.TCPConnector(limit=CONCURRENCY, ssl=False)
-    sem             = asyncio.Semaphore(CONCURRENCY)
-    jar             = aiohttp.CookieJar()
-    browser_cookies = load_cookies()
+    async def emit(rows: list[JobRecord]) -> None:
+        # Sinks and consumer all get USD/month salaries (salary.py)
+        for r in rows:
+            normalize_record(r, fx)
+        for sink in sinks:
+            sink.write(rows)
+        for r in rows:
+            await out.put(r)             # blocks while the consumer is behind
 
-    # Discover total pages from page 1
-    async with aiohttp.ClientSession(connector=connector, cookie_jar=jar) as session:
-        if browser_cookies:
-            session.cookie_jar.update_cookies(browser_cookies, response_url=YarlURL(BASE_URL))
+    def observe(rows: list[JobRecord]) -> None:
+        for r in rows:
+            normalize_record(r, fx)
+        for sink in observers:
+            sink.observe(rows)
 
-        log.info("Fetching page 1 to discover total pages…")
-        html = await fetch(session, f"{JOBS_URL}?page=1", sem)
-        if not html:
-            log.error("Failed to fetch page 1 — aborting")
-            return
-        first_stubs, total_pages = parse_listing_page(html)
-        log.info("Total pages: %d", total_pages)
-
-        # Save page 1 stubs immediately
-        new_stubs = [s for s in first_stubs if s.get("url") and s["url"] not in done_urls]
-        if new_stubs:
-            append_rows(new_stubs)
-            for s in new_stubs:
-                done_urls.add(s["url"])
-            save_checkpoint(done_urls, 1)
-            log.info("Page 1: saved %d jobs", len(new_stubs))
-
-        pages = list(range(max(2, last_page + 1), total_pages + 1))
-
-        async def fetch_and_save_page(page: int) -> int:
-            """Fetch one listing page, append new stubs to CSV immediately. Returns count saved."""
-            if _shutdown:
-                return 0
-            h = await fetch(session, f"{JOBS_URL}?page={page}", sem)
-            if not h:
-                log.warning("Empty response on listing page %d", page)
-                return 0
-            stubs, _ = parse_listing_page(h)
-            new = [s for s in stubs if s.get("url") and s["url"] not in done_urls]
-            if new:
-                append_rows(new)
+    try:
+        async with client:
+            # Discover total pages from page 1
+            log.info("Fetching page 1 to discover total pages…")
+            html = await fetch(client, f"{JOBS_URL}?page=1", sem, archive=config.archive)
+            if not html:
+                log.error("Failed to fetch page 1 — aborting")
+                return
+            first_stubs, total_pages = parse_listing_page(html)
+            log.info("Total pages: %d", total_pages)
+
+            async def save_page(page: int, stubs: list[JobRecord]) -> int:
+                """Hand one page's new stubs to the sinks and consumer. Returns count."""
+                if details:
+                    seen.update((s.url, s) for s in stubs if s.url)
+                new  = [s for s in stubs if s.url and s.url not in done_urls]
+                done = [s for s in stubs if s.url and s.url in done_urls]
                 for s in new:
-                    done_urls.add(s["url"])
-                save_checkpoint(done_urls, page)
-            return len(new)
-
-        log.info("Fetching %d listing pages (saving immediately)…", len(pages))
-        total_saved = len(new_stubs)
-
-        pbar = tqdm(total=len(pages), desc="Pages", unit="page")
-        tasks = [asyncio.create_task(fetch_and_save_page(p)) for p in pages]
-
-        for coro in asyncio.as_completed(tasks):
-            if _shutdown:
+                    done_urls.add(s.url)
+                if done and observers:
+                    observe(done)
+                if new:
+                    await emit(new)
+                    if ckpt_path is not None:
+                        save_checkpoint(done_urls, page, ckpt_path)
+                return len(new)
+
+            n = await save_page(1, first_stubs)
+            log.info("Page 1: saved %d jobs", n)
+
+            pages = list(range(max(2, last_page + 1), total_pages + 1))
+
+            async def fetch_and_save_page(page: int) -> int:
+                """Fetch one listing page and save its new stubs immediately."""
+                if _shutdown:
+                    return 0
+                h = await fetch(client, f"{JOBS_URL}?page={page}", sem, archive=config.archive)
+                if not h:
+                    log.warning("Empty response on listing page %d", page)
+                    return 0
+                stubs, _ = parse_listing_page(h)
+                return await save_page(page, stubs)
+
+            log.info("Fetching %d listing pages (saving immediately)…", len(pages))
+            total_saved = n
+
+            pbar  = _progress_bar(config, total=len(pages), desc="Pages", unit="page")
+            tasks = [asyncio.create_task(fetch_and_save_page(p)) for p in pages]
+            try:
+                for coro in asyncio.as_completed(tasks):
+                    if _shutdown:
+                        break
+                    total_saved += await coro
+                    pbar.update(1)
+                    pbar.set_postfix(saved=total_saved)
+            finally:
                 for t in tasks:
                     t.cancel()
-                break
-            n = await coro
-            total_saved += n
-            pbar.update(1)
-            pbar.set_postfix(saved=total_saved)
+                pbar.close()
+
+            if details and not _shutdown:
+                await _detail_pass(config, client, sem, list(seen.values()), DetailQueue(history, today), emit)
+
+            log.info("Transport — %s", client.summary())
+            clean = not _shutdown
+    finally:
+        for sink in sinks:
+            sink.close()
+        if config.archive is not None:
+            log.info("HTML archive — %s", config.archive.summary())
+            config.archive.close()
+        if clean and ckpt_path is not None:
+            ckpt_path.unlink(missing_ok=True)
+            log.info("Checkpoint cleared (clean finish)")
+
+
+async def _detail_pass(
+    config: ScrapeConfig,
+    client: Transport,
+    sem: asyncio.Semaphore,
+    stubs: list[JobRecord],
+    queue: DetailQueue,
+    emit,
+) -> None:
+    """
+    Fetch detail pages in priority order (see djinni_priority.py) until
+    `config.detail_budget` requests are spent, emitting each enriched record.
+    """
+    for s in stubs:
+        queue.push(s)
+    log.info(
+        "Detail queue: %d jobs (new=%d valuable=%d stale=%d backlog=%d fresh=%d), budget %d",
+        len(queue), *queue.tiers, config.detail_budget,
+    )
 
+    budget = RequestBudget(config.detail_budget)
+    pbar = _progress_bar(config, total=config.detail_budget, desc="Details", unit="req")
+
+    shown  = 0
+
+    async def worker() -> None:
+        # Workers pop synchronously, so the heap order is the fetch order
+        nonlocal shown
+        while budget.left > 0 and not _shutdown:
+            stub = queue.pop()
+            if stub is None:
+                return
+            result = await scrape_detail(client, sem, stub, config.archive, budget)
+            if result is not stub:
+                await emit([result])
+            spent = config.detail_budget - budget.left
+            pbar.update(spent - shown)
+            shown = spent
+
+    try:
+        await asyncio.gather(*(worker() for _ in range(config.concurrency)))
+    finally:
         pbar.close()
+    log.info("Detail pass: %d of %d requests spent",
+             config.detail_budget - budget.left, config.detail_budget)
+
+
+async def stream_jobs(config: ScrapeConfig | None = None) -> AsyncIterator[JobRecord]:
+    """
+    Scrape Djinni and yield JobRecords as they finish.
+
+    Listing stubs come first, one per new job; with a detail budget, the
+    enriched record for a job is yielded again later (same `url`, more
+    fields). Sinks in `config.sinks` receive the same rows and are closed
+    when the stream ends. At most `config.queue_size` records wait for the
+    consumer — beyond that, fetching pauses. Breaking out of the loop (or
+    aclose()) cancels the scrape and still closes the sinks.
+    """
+    config = config or ScrapeConfig()
+    queue: asyncio.Queue[JobRecord] = asyncio.Queue(config.queue_size)
+    producer = asyncio.create_task(_produce(config, queue))
+    try:
+        while True:
+            getter = asyncio.ensure_future(queue.get())
+            await asyncio.wait({getter, producer}, return_when=asyncio.FIRST_COMPLETED)
+            if getter.done():
+                yield getter.result()
+                continue
+            getter.cancel()
+            while not queue.empty():
+                yield queue.get_nowait()
+            producer.result()            # re-raise a producer failure
+            return
+    finally:
+        if not producer.done():
+            producer.cancel()
+            with suppress(asyncio.CancelledError):
+                await producer
+
+
+async def scrape() -> None:
+    """CLI run: CSV + snapshot + skill-index sinks, checkpointed, with progress bars."""
+    config = ScrapeConfig(
+        detail_budget=int(os.environ.get("DJINNI_DETAIL_BUDGET", DETAIL_BUDGET)),
+        http_backend=os.environ.get("DJINNI_HTTP_BACKEND", HTTP_BACKEND),
+        checkpoint_path=CHECKPOINT_PATH,
+        sinks=[CsvSink(OUTPUT_PATH), SnapshotStore(SNAPSHOT_PATH, CSV_FIELDS), SkillIndex(INDEX_PATH)],
+        progress=True,
+        archive=HtmlArchive(ARCHIVE_DIR),
+    )
+    async for _ in stream_jobs(config):
+        pass
 
     total_rows = sum(1 for _ in open(OUTPUT_PATH, encoding="utf-8")) - 1
     log.info("Done. %d total rows in %s", total_rows, OUTPUT_PATH)
 
-    if not _shutdown:
-        CHECKPOINT_PATH.unlink(missing_ok=True)
-        log.info("Checkpoint cleared (clean finish)")
+
+def main() -> None:
+    """CLI entry point: load .env, configure logging and signals, run the scrape."""
+    from dotenv import load_dotenv
+
+    # Load .env file if present (overrides are ignored — shell env takes priority)
+    load_dotenv(dotenv_path=ENV_PATH, override=False)
+    setup_logging()
+    install_signal_handlers()
+    asyncio.run(scrape())
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    main()
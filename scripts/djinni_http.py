@@ -0,0 +1,240 @@
+"""
+Djinni.co HTTP transport — tuned connection reuse, compression, HTTP/2
+────────────────────────────────────────────────────────────────────
+Two interchangeable backends behind one small interface used by fetch():
+
+  • AiohttpTransport  (default) — pooled keep-alive TCPConnector with DNS
+                                  caching; HTTP/1.1
+  • HttpxTransport    (optional) — httpx.AsyncClient with HTTP/2
+                                  multiplexing; needs `pip install httpx[http2]`
+
+Both negotiate br/gzip (br only when a brotli decoder is installed), return
+the body as bytes, and keep simple counters so a run can report bytes on
+the wire (compressed body bytes actually received) and mean latency.
+Client libraries are imported when a transport is opened, not when this
+module is imported.
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import logging
+import time
+import zlib
+from abc import ABC, abstractmethod
+from typing import Any
+
+log = logging.getLogger(__name__)
+
+DNS_CACHE_TTL     = 300      # seconds to cache resolved addresses
+KEEPALIVE_TIMEOUT = 60       # seconds an idle pooled connection stays open
+
+# Short pages below this size are checked for the IP-block message
+BLOCK_PAGE_MAX = 500
+BLOCK_MARKERS  = (b"blocked",)
+
+
+def _accept_encoding() -> str:
+    has_brotli = any(
+        importlib.util.find_spec(m) is not None for m in ("brotli", "brotlicffi")
+    )
+    return "br, gzip, deflate" if has_brotli else "gzip, deflate"
+
+
+def decode_body(raw: bytes, encoding: str | None) -> bytes:
+    """Undo Content-Encoding (gzip / deflate / br); raises ValueError on a bad body."""
+    encoding = (encoding or "").strip().lower()
+    try:
+        if encoding in ("", "identity"):
+            return raw
+        if encoding == "gzip":
+            return zlib.decompress(raw, 16 + zlib.MAX_WBITS)
+        if encoding == "deflate":
+            try:
+                return zlib.decompress(raw)
+            except zlib.error:                    # raw deflate without zlib header
+                return zlib.decompress(raw, -zlib.MAX_WBITS)
+        if encoding == "br":
+            try:
+                import brotli
+            except ImportError:
+                import brotlicffi as brotli
+            return brotli.decompress(raw)
+    except ValueError:
+        raise
+    except Exception as exc:                      # zlib.error, brotli.error
+        raise ValueError(f"cannot decode {encoding} body: {exc}") from exc
+    raise ValueError(f"unsupported Content-Encoding {encoding!r}")
+
+
+HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/122.0.0.0 Safari/537.36"
+    ),
+    "Accept-Language": "en-US,en;q=0.9",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Encoding": _accept_encoding(),
+    "Referer": "https://djinni.co/",
+    "Upgrade-Insecure-Requests": "1",
+}
+
+
+def is_block_page(body: bytes) -> bool:
+    """Cheap IP-block check on the raw body: only short pages are inspected."""
+    if len(body) >= BLOCK_PAGE_MAX:
+        return False
+    low = body.lower()
+    return any(m in low for m in BLOCK_MARKERS)
+
+
+class HTTPStatusError(Exception):
+    """HTTP status >= 400 other than 403/404/429; fetch() retries it like a network error."""
+
+    def __init__(self, status: int, url: str) -> None:
+        super().__init__(f"HTTP {status} for {url}")
+        self.status = status
+
+
+class Transport(ABC):
+    """
+    Abstract base: async context manager with get(url) -> (status, body bytes).
+
+    `errors` lists the exception types fetch() should treat as transient.
+    """
+
+    name = "base"
+    errors: tuple[type[BaseException], ...] = (HTTPStatusError,)
+
+    def __init__(self, *, concurrency: int, timeout: float, cookies: dict[str, str],
+                 base_url: str) -> None:
+        self.concurrency = concurrency
+        self.timeout     = timeout
+        self.cookies     = cookies
+        self.base_url    = base_url
+        self.requests    = 0
+        self.body_bytes  = 0      # decoded body bytes
+        self.wire_bytes  = 0      # body bytes as received (compressed, de-chunked)
+        self.elapsed     = 0.0
+
+    async def __aenter__(self) -> Transport:
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        pass
+
+    @abstractmethod
+    async def get(self, url: str) -> tuple[int, bytes]:
+        ...
+
+    def _record(self, started: float, body: bytes, wire: int) -> None:
+        self.requests   += 1
+        self.elapsed    += time.perf_counter() - started
+        self.body_bytes += len(body)
+        self.wire_bytes += wire
+
+    def summary(self) -> str:
+        mean_ms = self.elapsed / self.requests * 1000 if self.requests else 0.0
+        return (
+            f"{self.name}: {self.requests} requests, "
+            f"{self.wire_bytes / 1e6:.1f} MB on the wire, "
+            f"{self.body_bytes / 1e6:.1f} MB decoded, {mean_ms:.0f} ms mean latency"
+        )
+
+
+class AiohttpTransport(Transport):
+    name = "aiohttp"
+
+    async def __aenter__(self) -> AiohttpTransport:
+        import aiohttp
+        from yarl import URL as YarlURL
+
+        self.errors = (aiohttp.ClientError, HTTPStatusError)
+        self._payload_error = aiohttp.ClientPayloadError    # retried like other ClientErrors
+        connector = aiohttp.TCPConnector(
+            limit=self.concurrency,
+            limit_per_host=self.concurrency,
+            ttl_dns_cache=DNS_CACHE_TTL,
+            keepalive_timeout=KEEPALIVE_TIMEOUT,
+            enable_cleanup_closed=True,
+            ssl=False,
+        )
+        self._timeout = aiohttp.ClientTimeout(total=self.timeout)
+        self.session  = aiohttp.ClientSession(
+            connector=connector,
+            cookie_jar=aiohttp.CookieJar(),
+            headers=HEADERS,
+            # Decoded in get(), so the compressed size can be counted
+            auto_decompress=False,
+        )
+        if self.cookies:
+            self.session.cookie_jar.update_cookies(
+                self.cookies, response_url=YarlURL(self.base_url)
+            )
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self.session.close()
+
+    async def get(self, url: str) -> tuple[int, bytes]:
+        started = time.perf_counter()
+        async with self.session.get(
+            url, timeout=self._timeout, allow_redirects=True
+        ) as resp:
+            raw = await resp.read()
+            try:
+                body = decode_body(raw, resp.headers.get("Content-Encoding"))
+            except ValueError as exc:
+                raise self._payload_error(str(exc)) from exc
+            self._record(started, body, len(raw))
+            return resp.status, body
+
+
+class HttpxTransport(Transport):
+    name = "httpx/h2"
+
+    async def __aenter__(self) -> HttpxTransport:
+        import httpx
+
+        # HTTPError, not TransportError: decoding errors and redirect loops are
+        # RequestErrors too, and aiohttp's ClientError retries the same cases
+        self.errors = (httpx.HTTPError, HTTPStatusError)
+        self.client = httpx.AsyncClient(
+            http2=True,
+            headers=HEADERS,
+            cookies=self.cookies,
+            timeout=self.timeout,
+            follow_redirects=True,
+            verify=False,
+            limits=httpx.Limits(
+                max_connections=self.concurrency,
+                max_keepalive_connections=self.concurrency,
+                keepalive_expiry=KEEPALIVE_TIMEOUT,
+            ),
+        )
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self.client.aclose()
+
+    async def get(self, url: str) -> tuple[int, bytes]:
+        started = time.perf_counter()
+        resp = await self.client.get(url)
+        body = resp.content
+        self._record(started, body, resp.num_bytes_downloaded)
+        return resp.status_code, body
+
+
+def make_transport(backend: str, **kwargs: Any) -> Transport:
+    """
+    Build the transport for `backend` ("aiohttp" or "httpx").
+    Falls back to aiohttp when httpx or h2 is not installed.
+    """
+    if backend == "httpx":
+        if all(importlib.util.find_spec(m) is not None for m in ("httpx", "h2")):
+            return HttpxTransport(**kwargs)
+        log.warning("httpx[http2] not installed — falling back to aiohttp transport")
+    elif backend != "aiohttp":
+        raise ValueError(f"Unknown HTTP backend {backend!r} (expected 'aiohttp' or 'httpx')")
+    return AiohttpTransport(**kwargs)
@@ -0,0 +1,269 @@
+"""
+Djinni.co page parsers — listing (JSON-LD) and detail (JSON-LD + HTML)
+────────────────────────────────────────────────────────────────────
+Pure functions: HTML in, job dicts out. No I/O and no import-time side
+effects, so the module is cheap to import from tests, benchmarks and
+process-pool workers. BeautifulSoup/lxml are loaded on first parse.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from typing import Any
+
+from djinni_schema import JobRecord
+
+
+def _soup(html: str):
+    from bs4 import BeautifulSoup  # lazy: bs4 + lxml cost ~100 ms to import
+    return BeautifulSoup(html, "lxml")
+
+
+# ── Listing page parser ───────────────────────────────────────────────────────
+
+def _safe_int(v: Any) -> str:
+    try:
+        return str(int(v))
+    except (TypeError, ValueError):
+        return str(v) if v else ""
+
+
+def parse_listing_page(html: str) -> tuple[list[JobRecord], int]:
+    """
+    Returns (list_of_job_stubs, total_pages).
+    Stubs contain all fields extractable from JSON-LD on the listing page.
+    """
+    soup = _soup(html)
+    jobs: list[JobRecord] = []
+
+    for script in soup.find_all("script", type="application/ld+json"):
+        try:
+            data = json.loads(script.string or "")
+        except (json.JSONDecodeError, TypeError):
+            continue
+
+        postings: list[dict] = []
+        if isinstance(data, dict):
+            if data.get("@type") == "ItemList":
+                for item in data.get("itemListElement", []):
+                    p = item if item.get("@type") == "JobPosting" else item.get("item", {})
+                    if p.get("@type") == "JobPosting":
+                        postings.append(p)
+            elif data.get("@type") == "JobPosting":
+                postings.append(data)
+        elif isinstance(data, list):
+            postings = [d for d in data if isinstance(d, dict) and d.get("@type") == "JobPosting"]
+
+        for p in postings:
+            salary      = p.get("baseSalary", {}) or {}
+            sal_val     = salary.get("value", {}) or {}
+            org         = p.get("hiringOrganization", {}) or {}
+            exp         = p.get("experienceRequirements", {}) or {}
+            al          = p.get("applicantLocationRequirements", []) or []
+            if isinstance(al, dict):
+                al = [al]
+            regions = ", ".join(x.get("name", "") for x in al if isinstance(x, dict) and x.get("name"))
+
+            # detail fields default to "" and are filled later
+            jobs.append(JobRecord(
+                title             = p.get("title", ""),
+                company           = org.get("name", "") if isinstance(org, dict) else "",
+                url               = p.get("url", ""),
+                salary_min        = _safe_int(sal_val.get("minValue", "")),
+                salary_max        = _safe_int(sal_val.get("maxValue", "")),
+                salary_currency   = salary.get("currency", "") if sal_val else "",
+                salary_period     = str(sal_val.get("unitText", "")).upper() if sal_val else "",
+                job_type          = p.get("employmentType", ""),
+                category          = p.get("category", ""),
+                date_posted       = p.get("datePosted", ""),
+                location_type     = p.get("jobLocationType", ""),
+                location_regions  = regions,
+                experience_months = _safe_int(exp.get("monthsOfExperience", "")) if isinstance(exp, dict) else "",
+            ))
+
+    # Pagination: find max page number in pagination links
+    total_pages = 1
+    for a in soup.select("ul.pagination li a[href*='page=']"):
+        href = a.get("href", "")
+        m = re.search(r"page=(\d+)", href)
+        if m:
+            total_pages = max(total_pages, int(m.group(1)))
+
+    # Fallback: parse total count from heading
+    if total_pages == 1:
+        h = soup.find(string=re.compile(r"\d[\d\s,]+jobs?", re.I))
+        if h:
+            m = re.search(r"([\d\s,]+)", h)
+            if m:
+                n = int(m.group(1).replace(" ", "").replace(",", ""))
+                total_pages = max(1, (n + 14) // 15)
+
+    return jobs, total_pages
+
+
+# ── Detail page parser ────────────────────────────────────────────────────────
+
+def _text(el) -> str:
+    return el.get_text(" ", strip=True) if el else ""
+
+
+def parse_detail_page(html: str, stub: JobRecord) -> JobRecord | None:
+    """
+    Enrich a job stub with fields scraped from the detail page.
+    Djinni renders most meta as bare <span> tags with no CSS classes,
+    so we rely on full body-text regex + JSON-LD.
+    Returns None if the page is an IP-block response.
+    """
+    # Detect IP block / empty page
+    if len(html) < 500 and ("blocked" in html.lower() or "contact us" in html.lower()):
+        return None
+
+    soup = _soup(html)
+    job  = stub.copy()
+
+    # ── JSON-LD ───────────────────────────────────────────────────────────
+    for script in soup.find_all("script", type="application/ld+json"):
+        try:
+            data = json.loads(script.string or "")
+        except (json.JSONDecodeError, TypeError):
+            continue
+        if not isinstance(data, dict) or data.get("@type") != "JobPosting":
+            continue
+
+        # City & country from jobLocation
+        jp_loc = data.get("jobLocation", {}) or {}
+        addr   = jp_loc.get("address", {}) or {}
+        if isinstance(addr, dict):
+            loc = addr.get("addressLocality", "")
+            job["city"]    = job["city"]    or (loc[0] if isinstance(loc, list) else loc)
+            job["country"] = job["country"] or addr.get("addressCountry", "")
+
+        # Domain / industry — JSON-LD has explicit 'industry' key on detail pages
+        job["domain"] = job["domain"] or data.get("industry", "")
+
+        # Location regions from applicantLocationRequirements
+        if not job["location_regions"]:
+            alr = data.get("applicantLocationRequirements", [])
+            if isinstance(alr, dict):
+                alr = [alr]
+            regions: list[str] = []
+            for a in (alr or []):
+                if isinstance(a, dict):
+                    name = a.get("name", "")
+                    inner_addr = a.get("address", {}) or {}
+                    country = inner_addr.get("addressCountry", "") if isinstance(inner_addr, dict) else ""
+                    regions.append(name or country)
+            job["location_regions"] = ", ".join(r for r in regions if r)
+
+        # Full description
+        if not job["description"]:
+            raw_desc = data.get("description", "")
+            if raw_desc:
+                desc_soup = _soup(raw_desc)
+                job["description"] = desc_soup.get_text(" ", strip=True)[:2000]
+
+    # ── Full body text — all detail fields are bare <span> with no classes ─
+    body_text = soup.get_text(" ", strip=True)
+
+    # Views
+    m = re.search(r"(\d+)\s*views?", body_text, re.I)
+    if m:
+        job["views"] = job["views"] or m.group(1)
+
+    # Applications
+    m = re.search(r"(\d+)\s*application", body_text, re.I)
+    if m:
+        job["applications"] = job["applications"] or m.group(1)
+
+    # English level — ordered most-specific first
+    for pat, val in [
+        (r"upper[\s\-]?intermediate",  "Upper Intermediate"),
+        (r"lower[\s\-]?intermediate",  "Lower Intermediate"),
+        (r"no\s+english",              "No English"),
+        (r"c2",                        "C2 Proficient"),
+        (r"c1",                        "C1 Advanced"),
+        (r"b2",                        "B2 Upper Intermediate"),
+        (r"b1",                        "B1 Intermediate"),
+        (r"advanced",                  "Advanced"),
+        (r"fluent",                    "Fluent"),
+        (r"intermediate",              "Intermediate"),
+    ]:
+        if re.search(pat, body_text, re.I):
+            job["english_level"] = job["english_level"] or val
+            break
+
+    # Work format
+    for pat, val in [
+        (r"hybrid",       "Hybrid"),
+        (r"office\s+work","Office"),
+        (r"\boffice\b",   "Office"),
+        (r"remote\s+work","Remote"),
+        (r"\bremote\b",   "Remote"),
+    ]:
+        if re.search(pat, body_text, re.I):
+            job["work_format"] = job["work_format"] or val
+            break
+
+    # Experience years (e.g. "5 years", "3+ years")
+    m = re.search(r"(\d+)\+?\s*years?\s+of\s+exp|(\d+)\+?\s*years?\s+exp|(\d+)\s+years?\b", body_text, re.I)
+    if m:
+        yrs = next(g for g in m.groups() if g)
+        job["experience_years"] = job["experience_years"] or yrs + " years"
+
+    # Company type
+    for pat, val in [
+        (r"product\s+company", "Product"),
+        (r"outsource",         "Outsource"),
+        (r"outstaf",           "Outstaff"),
+        (r"startup",           "Startup"),
+        (r"agency",            "Agency"),
+    ]:
+        if re.search(pat, body_text, re.I):
+            job["company_type"] = job["company_type"] or val
+            break
+
+    # Company size (e.g. "51-200 employees", "200+ people")
+    m = re.search(r"(\d+[\+\-–]\d*)\s*(people|employees|specialists|engineers)?", body_text, re.I)
+    if m:
+        job["company_size"] = job["company_size"] or m.group(1).strip()
+
+    # Skills — Djinni links keywords in job descriptions / tag lists
+    if not job["skills"]:
+        skill_els = soup.select(
+            "a[href*='primary_keyword='], "
+            "a[href*='?keyword='], "
+            "a[href*='/jobs/?page=1&keywords=']"
+        )
+        if skill_els:
+            job["skills"] = ", ".join(
+                dict.fromkeys(el.get_text(strip=True) for el in skill_els if el.get_text(strip=True))
+            )
+
+    # Description fallback — look for the main content div
+    if not job["description"]:
+        for sel in [
+            "div[data-original-text]",
+            ".job-description__text",
+            ".job-description",
+            "#job-description",
+            "section.col-xs-12",
+        ]:
+            el = soup.select_one(sel)
+            if el:
+                job["description"] = el.get_text(" ", strip=True)[:2000]
+                break
+
+    # Title fallback
+    if not job["title"]:
+        h1 = soup.find("h1")
+        if h1:
+            job["title"] = _text(h1)
+
+    # Company fallback
+    if not job["company"]:
+        el = soup.select_one("a[href*='/jobs/company-']")
+        if el:
+            job["company"] = _text(el)
+
+    return job
@@ -0,0 +1,87 @@
+"""
+Djinni.co detail-stage scheduling — fetch the most valuable pages first
+────────────────────────────────────────────────────────────────────
+Detail pages cost one rate-limited request each, so the detail stage works
+through a priority queue and stops at a per-run request budget.
+
+Priority tiers (lower is fetched first), using what earlier runs recorded
+in the snapshot store (snapshots.detail_history):
+
+  0  new        — not seen by any earlier run in the lookback window
+  1  valuable   — never detailed and discloses a salary, or re-posted
+                  (date_posted changed since last seen)
+  2  stale      — detailed more than STALE_DAYS ago (views / applications
+                  have likely moved); oldest detail first
+  3  backlog    — never detailed, no salary
+  4  fresh      — detailed within STALE_DAYS and unchanged
+
+Ties are broken by most recent date_posted.
+"""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+from datetime import date, datetime
+
+from djinni_schema import JobRecord
+
+STALE_DAYS = 7       # re-fetch views / applications after this many days
+
+NEW, VALUABLE, STALE, BACKLOG, FRESH = range(5)
+
+
+def _posted_ts(value: str) -> float:
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        return 0.0
+
+
+def detail_priority(
+    stub: JobRecord,
+    hist: tuple[str, str | None, str] | None,
+    today: date,
+) -> tuple[int, int, float]:
+    """Sort key for one stub: (tier, -staleness in days, -date_posted timestamp)."""
+    newest_first = -_posted_ts(stub.date_posted)
+
+    if hist is None:
+        return NEW, 0, newest_first
+
+    _, detailed, posted = hist
+    reposted = bool(posted) and posted != stub.date_posted
+    if detailed is None:
+        tier = VALUABLE if (stub.salary_min or stub.salary_max or reposted) else BACKLOG
+        return tier, 0, newest_first
+    if reposted:
+        return VALUABLE, 0, newest_first
+
+    age = (today - date.fromisoformat(detailed)).days
+    if age > STALE_DAYS:
+        return STALE, -age, newest_first
+    return FRESH, 0, newest_first
+
+
+class DetailQueue:
+    """Min-heap of job stubs keyed by detail_priority()."""
+
+    def __init__(self, history: dict[str, tuple[str, str | None, str]], today: date) -> None:
+        self.history = history
+        self.today   = today
+        self._heap: list[tuple[tuple[int, int, float], int, JobRecord]] = []
+        self._seq    = itertools.count()      # stable order for equal keys
+        self.tiers   = [0] * 5
+
+    def push(self, stub: JobRecord) -> None:
+        if not stub.url:
+            return
+        key = detail_priority(stub, self.history.get(stub.url), self.today)
+        self.tiers[key[0]] += 1
+        heapq.heappush(self._heap, (key, next(self._seq), stub))
+
+    def pop(self) -> JobRecord | None:
+        return heapq.heappop(self._heap)[2] if self._heap else None
+
+    def __len__(self) -> int:
+        return len(self._heap)
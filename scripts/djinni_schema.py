@@ -0,0 +1,199 @@
+"""
+Djinni.co job schema — site URLs and the CSV column layout
+────────────────────────────────────────────────────────────────────
+Shared by the scraper, parsers, snapshot store and chart scripts.
+Also holds the compact in-memory row type (JobRecord) and the
+id-keyed dedup set (JobIdSet) used during a scrape.
+Standard library only; importing this module has no side effects.
+"""
+
+from __future__ import annotations
+
+import base64
+import re
+import zlib
+from typing import Iterable
+
+BASE_URL = "https://djinni.co"
+JOBS_URL = f"{BASE_URL}/jobs/"
+
+# All CSV columns
+CSV_FIELDS = [
+    # ── from listing page (JSON-LD) ──────────────────────────────────────
+    "title",
+    "company",
+    "url",
+    "salary_min",
+    "salary_max",
+    "salary_currency",
+    "job_type",           # FULL_TIME / PART_TIME / CONTRACTOR …
+    "category",           # e.g. Python, React.js
+    "date_posted",
+    "location_type",      # TELECOMMUTE / INPERSON
+    "location_regions",   # e.g. Ukraine, Worldwide
+    "experience_months",
+    # ── from detail page (HTML) ──────────────────────────────────────────
+    "english_level",      # e.g. Upper Intermediate
+    "experience_years",   # e.g. 3 years
+    "work_format",        # Remote / Office / Hybrid
+    "city",
+    "country",
+    "domain",             # e.g. FinTech, Healthcare
+    "company_type",       # e.g. Product / Outsource / Startup
+    "company_size",       # e.g. 51-200
+    "views",
+    "applications",
+    "skills",             # comma-separated tags
+    "description",        # full plain-text description
+    # ── listing JSON-LD, added later (kept at the end for CSV compatibility) ─
+    "salary_period",      # HOUR / DAY / WEEK / MONTH / YEAR (inferred if absent)
+    # ── derived at ingest by salary.py ───────────────────────────────────
+    "salary_min_usd",     # salary_min in USD / month
+    "salary_max_usd",     # salary_max in USD / month
+]
+
+# Columns a listing page fills (directly or via salary.py); the rest need a detail page
+LISTING_FIELDS = CSV_FIELDS[:12] + ["salary_period", "salary_min_usd", "salary_max_usd"]
+
+
+# ── Job record ────────────────────────────────────────────────────────────────
+
+class JobRecord:
+    """
+    One job row with a fixed slot per CSV column.
+
+    About a third of the memory of the equivalent dict (tracemalloc, CSV
+    rows: ~260-370 B vs ~840-950 B per row, values shared); unset columns
+    share the interned empty string. Supports the mapping subset the scraper
+    uses (`rec["col"]`, `rec.get()`, `copy()`) so it can be passed straight
+    to csv.DictWriter(extrasaction="ignore") and the snapshot store.
+    """
+
+    __slots__ = tuple(CSV_FIELDS)
+
+    def __init__(self, **fields: str) -> None:
+        for f in CSV_FIELDS:
+            setattr(self, f, fields.get(f, ""))
+
+    def __getitem__(self, key: str) -> str:
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __setitem__(self, key: str, value: str) -> None:
+        try:
+            setattr(self, key, value)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key: str, default: str | None = None) -> str | None:
+        return getattr(self, key, default) if key in self.__slots__ else default
+
+    def copy(self) -> JobRecord:
+        new = JobRecord.__new__(JobRecord)
+        for f in CSV_FIELDS:
+            setattr(new, f, getattr(self, f))
+        return new
+
+    def as_dict(self) -> dict[str, str]:
+        return {f: getattr(self, f) for f in CSV_FIELDS}
+
+    def __repr__(self) -> str:
+        return f"JobRecord(url={self.url!r}, title={self.title!r})"
+
+
+# ── Job identity & dedup ──────────────────────────────────────────────────────
+
+_JOB_ID_RE = re.compile(r"/jobs/(\d+)")
+
+
+def job_id(url: str) -> int | None:
+    """Numeric id from a job URL, e.g. …/jobs/804822-senior-backend/ → 804822."""
+    m = _JOB_ID_RE.search(url or "")
+    return int(m.group(1)) if m else None
+
+
+class JobIdSet:
+    """
+    Set of seen job URLs, keyed on the integer job id and held in a bitmap.
+
+    Djinni ids are dense (~800k today), so one bit per possible id costs
+    ~100 KB regardless of how many jobs were seen — far less than a set of
+    full URL strings. URLs without a numeric id fall back to a plain set,
+    and so do ids of MAX_BITMAP_ID or more, so one odd URL cannot blow up
+    the bitmap.
+    """
+
+    MAX_BITMAP_ID = 1 << 24          # bitmap never grows past 2 MB
+
+    __slots__ = ("_bits", "_count", "_other", "_big")
+
+    def __init__(self, urls: Iterable[str] = (), ids: Iterable[int] = ()) -> None:
+        self._bits  = bytearray()
+        self._count = 0
+        self._other: set[str] = set()
+        self._big:   set[int] = set()
+        for i in ids:
+            self._add_id(i)
+        for u in urls:
+            self.add(u)
+
+    def _add_id(self, i: int) -> None:
+        if i >= self.MAX_BITMAP_ID:
+            self._big.add(i)
+            return
+        byte, bit = divmod(i, 8)
+        if byte >= len(self._bits):
+            self._bits.extend(bytes(byte - len(self._bits) + 1 + len(self._bits) // 4))
+        if not self._bits[byte] & (1 << bit):
+            self._bits[byte] |= 1 << bit
+            self._count += 1
+
+    def add(self, url: str) -> None:
+        i = job_id(url)
+        if i is None:
+            self._other.add(url)
+        else:
+            self._add_id(i)
+
+    def __contains__(self, url: object) -> bool:
+        if not isinstance(url, str):
+            return False
+        i = job_id(url)
+        if i is None:
+            return url in self._other
+        if i >= self.MAX_BITMAP_ID:
+            return i in self._big
+        byte, bit = divmod(i, 8)
+        return byte < len(self._bits) and bool(self._bits[byte] & (1 << bit))
+
+    def __len__(self) -> int:
+        return self._count + len(self._big) + len(self._other)
+
+    def ids(self) -> list[int]:
+        """Seen job ids in ascending order."""
+        out: list[int] = []
+        for byte, v in enumerate(self._bits):
+            if v:
+                out.extend(byte * 8 + bit for bit in range(8) if v & (1 << bit))
+        return out + sorted(self._big)
+
+    def other_urls(self) -> list[str]:
+        return sorted(self._other)
+
+    def bitmap(self) -> str:
+        """The bitmap as compressed base64 text — O(1) Python work, for checkpoints."""
+        return base64.b64encode(zlib.compress(bytes(self._bits), 1)).decode("ascii")
+
+    @classmethod
+    def from_bitmap(cls, bitmap: str, big: Iterable[int] = (), urls: Iterable[str] = ()) -> JobIdSet:
+        """Inverse of bitmap(); `big` and `urls` restore the fallback sets."""
+        done = cls(urls=urls, ids=big)
+        done._bits  = bytearray(zlib.decompress(base64.b64decode(bitmap)))
+        done._count = int.from_bytes(done._bits, "little").bit_count()
+        return done
+
+    def big_ids(self) -> list[int]:
+        """Ids kept outside the bitmap (≥ MAX_BITMAP_ID)."""
+        return sorted(self._big)
@@ -1,10 +1,15 @@
 """
 Djinni.co Job Market — Business Intelligence Charts
 Generates all charts into the charts/ directory.
+
+  python scripts/generate_charts.py              # every posting
+  python scripts/generate_charts.py --distinct   # near-duplicate re-posts collapsed
+                                                 # (run scripts/dedup.py first)
 """
 
 from __future__ import annotations
 
+import argparse
 from pathlib import Path
 
 import matplotlib
@@ -14,6 +19,15 @@ import matplotlib.ticker as mticker
 import numpy as np
 import pandas as pd
 
+from dedup import DUPS_PATH
+from salary import normalize
+from snapshots import SNAPSHOT_PATH, open_store, weekly_trends
+
+ap = argparse.ArgumentParser(description="Generate BI charts from data/djinni.csv")
+ap.add_argument("--distinct", action="store_true",
+                help="count each near-duplicate cluster once (needs scripts/dedup.py output)")
+ARGS = ap.parse_args()
+
 # ── Paths ─────────────────────────────────────────────────────────────────────
 ROOT      = Path(__file__).parent.parent
 DATA_PATH = ROOT / "data" / "djinni.csv"
@@ -52,6 +66,20 @@ def save(fig: plt.Figure, name: str) -> None:
 # ── Load data ─────────────────────────────────────────────────────────────────
 print("Loading data…")
 df = pd.read_csv(DATA_PATH)
+if ARGS.distinct:
+    if not DUPS_PATH.exists():
+        raise SystemExit(f"{DUPS_PATH} not found — run scripts/dedup.py first")
+    canon = pd.read_csv(DUPS_PATH, usecols=["url", "is_canonical"])
+    n_all = len(df)
+    df = df.merge(canon, on="url", how="left")
+    df = df[df["is_canonical"].fillna(True).astype(bool)].drop(columns="is_canonical")
+    print(f"  Distinct mode: {n_all - len(df):,} near-duplicate re-posts collapsed")
+if "salary_max_usd" not in df or df["salary_max_usd"].isna().all():
+    print("  Salaries not normalized yet — converting in memory (run scripts/salary.py)")
+    df = normalize(df)
+# All salary charts use the ingest-time USD/month columns
+df["salary_min"] = pd.to_numeric(df["salary_min_usd"], errors="coerce")
+df["salary_max"] = pd.to_numeric(df["salary_max_usd"], errors="coerce")
 df["date_posted"] = pd.to_datetime(df["date_posted"], errors="coerce")
 df["hour"]        = df["date_posted"].dt.hour
 df["exp_years"]   = (df["experience_months"] / 12).round(1)
@@ -71,9 +99,7 @@ top_cats = df["category"].value_counts().head(25)
 
 fig, ax = plt.subplots(figsize=(10, 9))
 bars = ax.barh(top_cats.index[::-1], top_cats.values[::-1], color=BRAND, edgecolor="white")
-for bar, val in zip(bars, top_cats.values[::-1]):
-    ax.text(bar.get_width() + 8, bar.get_y() + bar.get_height() / 2,
-            f"{val:,}", va="center", fontsize=9, color=NEUTRAL)
+ax.bar_label(bars, fmt="{:,.0f}", padding=3, fontsize=9, color=NEUTRAL)
 ax.set_xlabel("Number of Open Positions")
 ax.set_title("Top 25 Most In-Demand Job Roles\n(Total Active Listings)")
 ax.set_xlim(0, top_cats.values.max() * 1.15)
@@ -133,10 +159,8 @@ dist = sal["bucket"].value_counts().reindex(labels, fill_value=0)
 
 fig, ax = plt.subplots(figsize=(11, 5))
 bars = ax.bar(dist.index, dist.values, color=BRAND, edgecolor="white")
-for bar, val in zip(bars, dist.values):
-    if val > 0:
-        ax.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 1,
-                str(val), ha="center", fontsize=9, color=NEUTRAL)
+ax.bar_label(bars, labels=np.where(dist.values > 0, dist.values.astype(str), ""),
+             padding=1, fontsize=9, color=NEUTRAL)
 ax.set_ylabel("Number of Jobs")
 ax.set_xlabel("Monthly Salary Range (USD)")
 ax.set_title("Salary Distribution Across All Advertised Roles\n(Monthly, USD)")
@@ -155,9 +179,7 @@ exp_dist = df["exp_bucket"].value_counts().reindex(exp_labels, fill_value=0)
 fig, ax = plt.subplots(figsize=(9, 5))
 colors = [BRAND if i < 3 else WARN for i in range(len(exp_dist))]
 bars = ax.bar(exp_dist.index, exp_dist.values, color=colors, edgecolor="white")
-for bar, val in zip(bars, exp_dist.values):
-    ax.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 15,
-            f"{val:,}", ha="center", fontsize=9.5, color=NEUTRAL)
+ax.bar_label(bars, fmt="{:,.0f}", padding=2, fontsize=9.5, color=NEUTRAL)
 ax.set_ylabel("Number of Positions")
 ax.set_xlabel("Experience Required")
 ax.set_title("How Much Experience Do Employers Require?\n(All Active Listings)")
@@ -194,9 +216,7 @@ fig, ax = plt.subplots(figsize=(10, 8))
 colors = [BRAND if i < 5 else NEUTRAL for i in range(len(top_employers))]
 bars = ax.barh(top_employers.index[::-1], top_employers.values[::-1],
                color=colors[::-1], edgecolor="white")
-for bar, val in zip(bars, top_employers.values[::-1]):
-    ax.text(bar.get_width() + 0.3, bar.get_y() + bar.get_height()/2,
-            str(val), va="center", fontsize=9.5, color=NEUTRAL)
+ax.bar_label(bars, padding=3, fontsize=9.5, color=NEUTRAL)
 ax.set_xlabel("Number of Active Job Postings")
 ax.set_title("Top 20 Most Active Hiring Companies\n(by Open Positions)")
 ax.set_xlim(0, top_employers.values.max() * 1.15)
@@ -236,9 +256,7 @@ fig, ax = plt.subplots(figsize=(10, 6))
 bars = ax.barh(sal_top.index[::-1], sal_top["median"][::-1],
                color=[ACCENT if i < 3 else BRAND for i in range(len(sal_top))][::-1],
                edgecolor="white")
-for bar, val in zip(bars, sal_top["median"][::-1]):
-    ax.text(bar.get_width() + 30, bar.get_y() + bar.get_height()/2,
-            f"${val:,.0f}", va="center", fontsize=9.5, color=NEUTRAL)
+ax.bar_label(bars, fmt="${:,.0f}", padding=3, fontsize=9.5, color=NEUTRAL)
 ax.set_xlabel("Median Monthly Salary (USD)")
 ax.set_title("Top 10 Highest-Paying Job Categories\n(Median Monthly Salary, USD)")
 ax.xaxis.set_major_formatter(mticker.FuncFormatter(lambda x, _: f"${x:,.0f}"))
@@ -257,14 +275,25 @@ matrix = matrix[matrix["demand"] >= 20]
 med_demand = matrix["demand"].median()
 med_salary = matrix["med_salary"].median()
 
+# Quadrant per category, computed for the whole frame at once
+QUADRANTS   = [ACCENT, BRAND, WARN, NEUTRAL]
+MAX_LABELS  = 30             # annotate only the most extreme categories
+high_demand = matrix["demand"].to_numpy() >= med_demand
+high_pay    = matrix["med_salary"].to_numpy() >= med_salary
+matrix["quadrant"] = np.select(
+    [high_demand & high_pay, high_demand, high_pay], [0, 1, 2], default=3)
+
 fig, ax = plt.subplots(figsize=(11, 8))
-for _, row in matrix.iterrows():
-    q_color = (ACCENT  if row["demand"] >= med_demand and row["med_salary"] >= med_salary else
-               BRAND   if row["demand"] >= med_demand else
-               WARN    if row["med_salary"] >= med_salary else
-               NEUTRAL)
-    ax.scatter(row["demand"], row["med_salary"], s=120, color=q_color, alpha=0.8, zorder=3)
-    ax.annotate(_.replace(" ", "\n"), (row["demand"], row["med_salary"]),
+for q, pts in matrix.groupby("quadrant"):
+    ax.scatter(pts["demand"], pts["med_salary"], s=120, color=QUADRANTS[q],
+               alpha=0.8, zorder=3)
+
+# Label de-cluttering: rank by normalised distance from the median cross-hair
+spread = (np.abs(np.log(matrix["demand"] / med_demand))
+          + np.abs(np.log(matrix["med_salary"] / med_salary)))
+labelled = matrix.loc[spread.nlargest(MAX_LABELS).index]
+for cat, x, y in zip(labelled.index, labelled["demand"], labelled["med_salary"]):
+    ax.annotate(cat.replace(" ", "\n"), (x, y),
                 textcoords="offset points", xytext=(4, 4), fontsize=7, color="#333")
 
 ax.axvline(med_demand, color="gray", linestyle="--", alpha=0.5)
@@ -292,6 +321,37 @@ ax.legend(handles=legend_elements, frameon=False, fontsize=8, loc="lower right")
 fig.tight_layout()
 save(fig, "10_demand_vs_salary.png")
 
+# ── 11. Week-over-Week Trends (from snapshot store) ───────────────────────────
+print("Chart 11 – Week-over-week trends")
+trends = pd.DataFrame()
+if SNAPSHOT_PATH.exists():
+    conn = open_store(SNAPSHOT_PATH)
+    trends = pd.DataFrame(weekly_trends(conn, "category"))
+    conn.close()
+if not trends.empty:
+    trends = trends.dropna(subset=["demand_change_pct"])
+
+if trends.empty:
+    print("  – skipped (need snapshots covering two consecutive weeks)")
+else:
+    tr = trends.head(20).set_index("category").iloc[::-1]
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(13, 8), sharey=True)
+    ax1.barh(tr.index, tr["demand_change_pct"],
+             color=np.where(tr["demand_change_pct"] >= 0, ACCENT, WARN), edgecolor="white")
+    ax1.axvline(0, color="gray", linewidth=0.8)
+    ax1.set_xlabel("Change in Avg Daily Listings (%)")
+    ax1.set_title("Demand, Week over Week")
+    sal_chg = tr["salary_change_pct"].astype(float)
+    ax2.barh(tr.index, sal_chg.fillna(0),
+             color=np.where(sal_chg.fillna(0) >= 0, ACCENT, WARN), edgecolor="white")
+    ax2.axvline(0, color="gray", linewidth=0.8)
+    ax2.set_xlabel("Change in Mean Salary Midpoint (%)")
+    ax2.set_title("Salary, Week over Week")
+    fig.suptitle("Top 20 Categories — Week-over-Week Change\n(from daily scrape snapshots)",
+                 fontweight="bold")
+    fig.tight_layout()
+    save(fig, "11_weekly_trends.png")
+
 # ── Summary stats for README ───────────────────────────────────────────────────
 print("\n── Summary for README ──")
 print(f"Total listings:          {len(df):,}")
@@ -0,0 +1,352 @@
+"""
+Djinni.co raw-HTML archive — append-only compressed segments + re-parse
+────────────────────────────────────────────────────────────────────
+Every page the scraper fetches is archived so that a parser fix can be
+backfilled without touching the network:
+
+  • segments — data/html_archive/seg-NNNNN.bin, append-only; each page is
+               one independently compressed frame (zstd when `zstandard`
+               is installed, zlib otherwise), so any page can be read alone
+  • index    — data/html_archive/index.sqlite: url → (segment, offset,
+               length, codec, fetched_at), one row per fetch
+
+Segments roll over at SEGMENT_BYTES. Readers memory-map a segment and
+decompress straight from the mapping — no read() copies.
+
+`reparse` re-runs the current parsers (djinni_parsers.py) over the last
+copy of every page fetched on each day, in a process pool. Its rows
+replace the stored ones in the CSV, the snapshot store (partition = day
+the page was fetched) and the skill index, so a value a fixed parser no
+longer extracts is cleared:
+
+  python scripts/html_archive.py reparse
+  python scripts/html_archive.py reparse --workers 8
+  python scripts/html_archive.py stats
+"""
+
+from __future__ import annotations
+
+import argparse
+import bisect
+import mmap
+import os
+import sqlite3
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import NamedTuple
+
+from djinni_schema import CSV_FIELDS, JobRecord, job_id
+from salary import load_fx_rates, normalize_record
+
+ROOT          = Path(__file__).parent.parent
+ARCHIVE_DIR   = ROOT / "data" / "html_archive"
+SEGMENT_BYTES = 256 * 1024 * 1024    # start a new segment file past this size
+ZSTD_LEVEL    = 6
+ZLIB_LEVEL    = 6
+COMMIT_EVERY  = 200                  # index rows per SQLite commit while writing
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    url         TEXT NOT NULL,
+    fetched_at  TEXT NOT NULL,
+    segment     INTEGER NOT NULL,
+    offset      INTEGER NOT NULL,
+    length      INTEGER NOT NULL,
+    raw_length  INTEGER NOT NULL,
+    codec       TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pages_url ON pages (url);
+"""
+
+
+def _compressor() -> tuple[str, object]:
+    """(codec name, compress(bytes) -> bytes) — zstd if available."""
+    try:
+        import zstandard
+    except ImportError:
+        return "zlib", lambda b: zlib.compress(b, ZLIB_LEVEL)
+    return "zstd", zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress
+
+
+def _decompress(codec: str, frame: memoryview) -> bytes:
+    if codec == "zlib":
+        return zlib.decompress(frame)
+    if codec == "zstd":
+        try:
+            import zstandard
+        except ImportError:
+            raise RuntimeError("archive has zstd frames — `pip install zstandard` to read them") from None
+        return zstandard.ZstdDecompressor().decompress(frame)
+    raise ValueError(f"unknown archive codec {codec!r}")
+
+
+def segment_path(archive_dir: Path, segment: int) -> Path:
+    return archive_dir / f"seg-{segment:05d}.bin"
+
+
+class HtmlArchive:
+    """
+    Append-only writer. add() compresses one page into the current segment
+    and records it in the index; close() flushes both.
+    """
+
+    def __init__(self, archive_dir: Path = ARCHIVE_DIR) -> None:
+        archive_dir.mkdir(parents=True, exist_ok=True)
+        self.dir   = archive_dir
+        self.codec, self._compress = _compressor()
+        self.pages = 0
+        self.bytes_in = self.bytes_out = 0
+
+        self.conn = sqlite3.connect(archive_dir / "index.sqlite")
+        self.conn.executescript(_SCHEMA)
+        last = self.conn.execute("SELECT MAX(segment) FROM pages").fetchone()[0]
+        self._segment = last or 1
+        self._file = open(segment_path(archive_dir, self._segment), "ab")
+        self._pending = 0
+
+    def add(self, url: str, body: bytes) -> None:
+        if self._file.tell() >= SEGMENT_BYTES:
+            self._file.close()
+            self._segment += 1
+            self._file = open(segment_path(self.dir, self._segment), "ab")
+
+        frame  = self._compress(body)
+        offset = self._file.tell()
+        self._file.write(frame)
+        self.conn.execute(
+            "INSERT INTO pages VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (url, datetime.now(timezone.utc).isoformat(timespec="seconds"),
+             self._segment, offset, len(frame), len(body), self.codec),
+        )
+        self.pages    += 1
+        self.bytes_in += len(body)
+        self.bytes_out += len(frame)
+        self._pending += 1
+        if self._pending >= COMMIT_EVERY:
+            self._flush()
+
+    def _flush(self) -> None:
+        # Frame bytes reach the file before their index rows are committed,
+        # so a crash can orphan a frame but never index a missing one.
+        self._file.flush()
+        self.conn.commit()
+        self._pending = 0
+
+    def summary(self) -> str:
+        ratio = self.bytes_in / self.bytes_out if self.bytes_out else 0
+        return (f"{self.pages} pages, {self.bytes_in / 1e6:.1f} MB → "
+                f"{self.bytes_out / 1e6:.1f} MB ({self.codec}, {ratio:.1f}×)")
+
+    def close(self) -> None:
+        self._flush()
+        self._file.close()
+        self.conn.close()
+
+
+# ── Reading ───────────────────────────────────────────────────────────────────
+
+class PageRef(NamedTuple):
+    url: str
+    fetched_at: str
+    segment: int
+    offset: int
+    length: int
+    codec: str
+
+    @property
+    def day(self) -> date:
+        return date.fromisoformat(self.fetched_at[:10])
+
+
+def daily_pages(archive_dir: Path = ARCHIVE_DIR) -> list[PageRef]:
+    """
+    Last archived copy of every URL on each day it was fetched, oldest
+    first. Listing URLs (?page=N) are re-used every day, so keeping one
+    copy per URL would lose every earlier day's listings.
+    """
+    conn = sqlite3.connect(f"file:{archive_dir / 'index.sqlite'}?mode=ro", uri=True)
+    # SQLite returns the bare columns of the row holding MAX(rowid)
+    rows = conn.execute(
+        "SELECT url, fetched_at, segment, offset, length, codec, MAX(rowid) "
+        "FROM pages GROUP BY url, substr(fetched_at, 1, 10) ORDER BY MAX(rowid)"
+    ).fetchall()
+    conn.close()
+    return [PageRef(*r[:6]) for r in rows]
+
+
+_maps: dict[tuple[str, int], mmap.mmap] = {}    # per-process segment mappings
+
+
+def read_page(ref: PageRef, archive_dir: Path = ARCHIVE_DIR) -> bytes:
+    """Decompress one page straight out of its memory-mapped segment."""
+    key = (str(archive_dir), ref.segment)
+    mm  = _maps.get(key)
+    if mm is None:
+        with open(segment_path(archive_dir, ref.segment), "rb") as f:
+            mm = _maps[key] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return _decompress(ref.codec, memoryview(mm)[ref.offset:ref.offset + ref.length])
+
+
+def is_listing_url(url: str) -> bool:
+    return "page=" in url and job_id(url) is None
+
+
+# ── Re-parse (process pool workers) ───────────────────────────────────────────
+
+def _parse_listing(args: tuple[PageRef, Path]) -> list[dict[str, str]]:
+    from djinni_parsers import parse_listing_page
+
+    ref, archive_dir = args
+    html = read_page(ref, archive_dir).decode("utf-8", errors="replace")
+    stubs, _ = parse_listing_page(html)
+    return [s.as_dict() for s in stubs if s.url]
+
+
+def _parse_detail(args: tuple[PageRef, dict[str, str], Path]) -> dict[str, str] | None:
+    from djinni_parsers import parse_detail_page
+
+    ref, stub_fields, archive_dir = args
+    stub = JobRecord(**stub_fields)
+    html = read_page(ref, archive_dir).decode("utf-8", errors="replace")
+    result = parse_detail_page(html, stub)
+    return result.as_dict() if result is not None else None
+
+
+class Reparsed(NamedTuple):
+    by_day: dict[date, dict[str, JobRecord]]   # fetch day → url → row (detail over listing)
+    latest: dict[str, JobRecord]               # url → all days merged, later non-empty wins
+    detailed: dict[date, set[str]]             # fetch day → urls whose detail page parsed
+    listing_pages: int
+    detail_pages: int
+
+
+def reparse(archive_dir: Path = ARCHIVE_DIR, workers: int | None = None) -> Reparsed:
+    """
+    Re-parse every day's archived pages.
+
+    Listing pages are parsed first to rebuild each day's stubs; each detail
+    page is then parsed on top of its job's stub from the same day, else
+    the nearest earlier day, else the nearest later one (or an empty record
+    with just the URL). Rows come back per fetch day (for the snapshot
+    partitions) and merged per job (for the CSV and skill index), with
+    salaries normalized, along with which jobs each day's detail pages
+    covered — the other rows only carry listing columns.
+    """
+    refs     = daily_pages(archive_dir)
+    listings = [r for r in refs if is_listing_url(r.url)]
+    details  = [r for r in refs if job_id(r.url) is not None]
+    workers  = workers or os.cpu_count() or 1
+
+    by_day:   dict[date, dict[str, JobRecord]] = {}
+    detailed: dict[date, set[str]] = {}
+    # url → [(day, stub)], days ascending since refs are in fetch order
+    stubs:  dict[str, list[tuple[date, dict[str, str]]]] = {}
+
+    def stub_for(url: str, day: date) -> dict[str, str]:
+        seen = stubs.get(url)
+        if not seen:
+            return {"url": url}
+        i = bisect.bisect_right([d for d, _ in seen], day)
+        return seen[i - 1][1] if i else seen[0][1]
+
+    with ProcessPoolExecutor(workers) as pool:
+        chunk = max(1, len(listings) // (workers * 4))
+        for ref, rows in zip(listings, pool.map(_parse_listing, [(r, archive_dir) for r in listings],
+                                                chunksize=chunk)):
+            for row in rows:
+                seen = stubs.setdefault(row["url"], [])
+                if seen and seen[-1][0] == ref.day:
+                    seen[-1] = (ref.day, row)    # later page of the same day wins
+                else:
+                    seen.append((ref.day, row))
+            by_day.setdefault(ref.day, {}).update((row["url"], JobRecord(**row)) for row in rows)
+
+        chunk = max(1, len(details) // (workers * 4))
+        jobs  = [(r, stub_for(r.url, r.day), archive_dir) for r in details]
+        for ref, row in zip(details, pool.map(_parse_detail, jobs, chunksize=chunk)):
+            if row is None:
+                continue                         # parser rejected it; listing row stands
+            by_day.setdefault(ref.day, {})[ref.url] = JobRecord(**row)
+            detailed.setdefault(ref.day, set()).add(ref.url)
+
+    # Merged only across re-parsed rows, never with what is stored
+    latest: dict[str, JobRecord] = {}
+    for day in sorted(by_day):
+        for url, row in by_day[day].items():
+            if url not in latest:
+                latest[url] = row.copy()
+                continue
+            merged = latest[url]
+            for f, v in row.as_dict().items():
+                if v:
+                    merged[f] = v
+
+    fx = load_fx_rates()
+    for row in (*latest.values(), *(r for rows in by_day.values() for r in rows.values())):
+        normalize_record(row, fx)
+    return Reparsed(by_day, latest, detailed, len(listings), len(details))
+
+
+# ── CLI ───────────────────────────────────────────────────────────────────────
+
+def _stats(archive_dir: Path) -> None:
+    conn = sqlite3.connect(f"file:{archive_dir / 'index.sqlite'}?mode=ro", uri=True)
+    pages, urls, raw, packed, first, last = conn.execute(
+        "SELECT COUNT(*), COUNT(DISTINCT url), SUM(raw_length), SUM(length), "
+        "MIN(fetched_at), MAX(fetched_at) FROM pages"
+    ).fetchone()
+    segments = conn.execute("SELECT COUNT(DISTINCT segment) FROM pages").fetchone()[0]
+    print(f"{pages or 0:,} pages ({urls or 0:,} URLs) in {segments} segment(s), {first} → {last}")
+    if packed:
+        print(f"{raw / 1e6:,.1f} MB HTML stored as {packed / 1e6:,.1f} MB ({raw / packed:.1f}×)")
+
+
+def main() -> None:
+    from djinni import OUTPUT_PATH, CsvSink
+    from skill_index import INDEX_PATH, SkillIndex
+    from snapshots import SNAPSHOT_PATH, SnapshotStore
+
+    ap  = argparse.ArgumentParser(description="Raw-HTML archive of fetched pages")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    r = sub.add_parser("reparse", help="re-run the parsers over the archive, no network")
+    r.add_argument("-j", "--workers", type=int, help="parser processes (default: all cores)")
+    sub.add_parser("stats", help="archive size and date range")
+    args = ap.parse_args()
+
+    if not (ARCHIVE_DIR / "index.sqlite").exists():
+        raise SystemExit(f"No archive at {ARCHIVE_DIR} — run the scraper first")
+    if args.cmd == "stats":
+        _stats(ARCHIVE_DIR)
+        return
+
+    started = time.perf_counter()
+    result  = reparse(ARCHIVE_DIR, args.workers)
+    parsed  = time.perf_counter() - started
+    total   = result.listing_pages + result.detail_pages
+    print(f"Re-parsed {result.listing_pages:,} listing + {result.detail_pages:,} detail pages "
+          f"in {parsed:.1f}s ({total / parsed if parsed else 0:,.0f} pages/s)")
+
+    # Re-parsed rows replace the stored ones, so values a fixed parser no
+    # longer extracts are cleared — detail columns only for jobs whose detail
+    # page was re-parsed. Snapshot rows go to the partition of the day each
+    # page was fetched; jobs absent from the archive are untouched.
+    run_id = "reparse-" + datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    for day, rows in sorted(result.by_day.items()):
+        store = SnapshotStore(SNAPSHOT_PATH, CSV_FIELDS, run_id=f"{run_id}-{day:%Y%m%d}",
+                              day=day, replace=True, detailed=result.detailed.get(day, set()))
+        store.write(list(rows.values()))
+        store.close()
+    detailed = set().union(*result.detailed.values())
+    for sink in (CsvSink(OUTPUT_PATH, replace=True, detailed=detailed),
+                 SkillIndex(INDEX_PATH, replace=True, detailed=detailed)):
+        sink.write(list(result.latest.values()))
+        sink.close()
+    print(f"Replaced {len(result.latest):,} jobs in {OUTPUT_PATH} and {INDEX_PATH}, "
+          f"{len(result.by_day)} partition(s) in {SNAPSHOT_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Djinni.co salary normalization — every salary as USD / month
+────────────────────────────────────────────────────────────────────
+Listings advertise salaries in their own currency and period. This stage
+converts `salary_min` / `salary_max` to USD per month and persists the
+result as `salary_min_usd` / `salary_max_usd`, so charts, the snapshot
+store and the skill index read ready-made columns. normalize_record()
+converts one row (stdlib only, used by the scraper at ingest);
+normalize() applies the same rules to a whole DataFrame at once.
+
+  • FX     — local table data/fx_rates.csv (currency, usd_per_unit, as_of);
+             no network access. Edit the file to refresh rates. Empty
+             currency is treated as USD; unknown currencies stay blank.
+  • Period — JSON-LD unitText (salary_period) when present, otherwise
+             inferred from the USD amount: ≤ HOURLY_MAX → HOUR,
+             ≥ ANNUAL_MIN → YEAR, else MONTH. The resolved period is
+             written back to `salary_period`.
+
+The scraper normalizes every row before it reaches the CSV, snapshot store
+and skill index. Run this by hand after editing the FX table or on an
+older CSV:
+
+  python scripts/salary.py
+"""
+
+from __future__ import annotations
+
+import csv
+from pathlib import Path
+from typing import TYPE_CHECKING, MutableMapping
+
+from djinni_schema import CSV_FIELDS
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+ROOT      = Path(__file__).parent.parent
+DATA_PATH = ROOT / "data" / "djinni.csv"
+FX_PATH   = ROOT / "data" / "fx_rates.csv"
+
+# Multiplier from one unit of each period to one month
+PERIOD_TO_MONTH = {
+    "HOUR":  160.0,           # 40 h × 4 weeks
+    "DAY":   21.0,            # working days
+    "WEEK":  52 / 12,
+    "MONTH": 1.0,
+    "YEAR":  1 / 12,
+}
+HOURLY_MAX = 100              # USD amounts up to this are read as hourly rates
+ANNUAL_MIN = 30_000           # lower bounds from this up are read as annual
+
+
+def load_fx_rates(path: Path = FX_PATH) -> dict[str, float]:
+    """USD per unit by upper-case ISO currency code."""
+    with open(path, newline="", encoding="utf-8") as f:
+        return {r["currency"].strip().upper(): float(r["usd_per_unit"]) for r in csv.DictReader(f)}
+
+
+def load_fx(path: Path = FX_PATH) -> pd.Series:
+    """load_fx_rates() as a Series, for normalize()."""
+    import pandas as pd
+
+    return pd.Series(load_fx_rates(path), dtype=float)
+
+
+def _amount(value: str | None) -> float | None:
+    try:
+        return float(value) if value not in (None, "") else None
+    except ValueError:
+        return None
+
+
+def normalize_record(row: MutableMapping[str, str], fx: dict[str, float]) -> None:
+    """
+    Same rules as normalize(), for one row in place: resolves
+    salary_period and fills salary_min_usd / salary_max_usd ("" when the
+    salary or its currency is unknown).
+    """
+    cur  = (row.get("salary_currency") or "").strip().upper() or "USD"
+    rate = fx.get(cur)
+    lo, hi = _amount(row.get("salary_min")), _amount(row.get("salary_max"))
+    lo_usd = lo * rate if lo is not None and rate is not None else None
+    hi_usd = hi * rate if hi is not None and rate is not None else None
+    top    = hi_usd if hi_usd is not None else lo_usd
+
+    period = ""
+    if top is not None:
+        period = (row.get("salary_period") or "").upper()
+        if period not in PERIOD_TO_MONTH:
+            if top <= HOURLY_MAX:
+                period = "HOUR"
+            elif (lo_usd if lo_usd is not None else top) >= ANNUAL_MIN:
+                period = "YEAR"
+            else:
+                period = "MONTH"
+
+    factor = PERIOD_TO_MONTH.get(period)
+    row["salary_period"]  = period
+    row["salary_min_usd"] = str(round(lo_usd * factor)) if lo_usd is not None and factor else ""
+    row["salary_max_usd"] = str(round(hi_usd * factor)) if hi_usd is not None and factor else ""
+
+
+def normalize(df: pd.DataFrame, fx: pd.Series | None = None) -> pd.DataFrame:
+    """
+    Return a copy of `df` with salary_period resolved and salary_min_usd /
+    salary_max_usd filled (NaN where the salary or its currency is unknown).
+    """
+    import numpy as np
+    import pandas as pd
+
+    fx  = load_fx() if fx is None else fx
+    out = df.copy()
+
+    lo  = pd.to_numeric(out["salary_min"], errors="coerce")
+    hi  = pd.to_numeric(out["salary_max"], errors="coerce")
+    cur = out["salary_currency"].fillna("").astype(str).str.strip().str.upper()
+    rate = cur.replace("", "USD").map(fx)           # NaN for unknown currency
+
+    lo_usd, hi_usd = lo * rate, hi * rate
+    top = hi_usd.fillna(lo_usd)
+
+    given = (out["salary_period"].fillna("").astype(str).str.upper()
+             if "salary_period" in out else pd.Series("", index=out.index))
+    inferred = np.select(
+        [top <= HOURLY_MAX, lo_usd.fillna(top) >= ANNUAL_MIN],
+        ["HOUR", "YEAR"],
+        default="MONTH",
+    )
+    period = given.where(given.isin(list(PERIOD_TO_MONTH)), inferred)
+    period = period.where(top.notna(), "")
+
+    factor = period.map(PERIOD_TO_MONTH)
+    out["salary_period"]  = period
+    out["salary_min_usd"] = (lo_usd * factor).round()
+    out["salary_max_usd"] = (hi_usd * factor).round()
+    return out
+
+
+def normalize_csv(path: Path = DATA_PATH, fx_path: Path = FX_PATH) -> int:
+    """Normalize a djinni.csv in place. Returns the number of rows with a USD salary."""
+    import pandas as pd
+
+    df  = pd.read_csv(path, dtype=str, keep_default_na=False)
+    out = normalize(df, load_fx(fx_path))
+    for col in ("salary_min_usd", "salary_max_usd"):
+        out[col] = out[col].astype("Int64").astype("string").fillna("")
+    out = out.reindex(columns=CSV_FIELDS, fill_value="")
+
+    tmp = path.with_suffix(".csv.tmp")
+    out.to_csv(tmp, index=False)
+    tmp.replace(path)
+    return int((out["salary_max_usd"] != "").sum())
+
+
+def main() -> None:
+    n = normalize_csv()
+    print(f"Normalized {n:,} salaries to USD/month in {DATA_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,351 @@
+"""
+Djinni.co skill / keyword index — inverted index with numeric filters
+────────────────────────────────────────────────────────────────────
+SQLite store (data/skill_index.sqlite) kept up to date by the scraper:
+
+  • jobs    — one row per job id: title, company, category, salary,
+              experience; B-tree indexes on the numeric filter columns
+  • skills  — postings list (skill → job id), WITHOUT ROWID clustered on
+              (skill, job_id); skills are normalized ("Golang" → "go",
+              "K8s" → "kubernetes") and include the listing category
+  • docs    — FTS5 full-text index over title, skills and description
+
+A query intersects the skill postings, optionally matches FTS5 tokens,
+and filters numerically — all through indexes, no CSV scan.
+
+Usage:
+  python scripts/skill_index.py build                 # (re)build from data/djinni.csv
+  python scripts/skill_index.py query -s kubernetes -s go --min-salary 4000
+  python scripts/skill_index.py query -t "fintech payments" --max-exp 36
+  python scripts/skill_index.py skills --top 30       # most common skills
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import re
+import sqlite3
+import time
+from pathlib import Path
+from typing import Container, Iterable, Mapping
+
+from djinni_schema import job_id
+
+ROOT       = Path(__file__).parent.parent
+DATA_PATH  = ROOT / "data" / "djinni.csv"
+INDEX_PATH = ROOT / "data" / "skill_index.sqlite"
+
+# Spelling variants seen in Djinni categories and skill tags
+SKILL_ALIASES = {
+    "golang": "go",
+    "k8s": "kubernetes",
+    "js": "javascript",
+    "javascript / front-end": "javascript",
+    "ts": "typescript",
+    "react.js": "react",
+    "reactjs": "react",
+    "node.js": "node",
+    "nodejs": "node",
+    "vue.js": "vue",
+    "vuejs": "vue",
+    "angularjs": "angular",
+    "postgres": "postgresql",
+    "cpp": "c++",
+    "c/c++": "c++",
+    "dotnet": ".net",
+    ".net core": ".net",
+    "ml ai": "ml/ai",
+    "ml": "ml/ai",
+    "ai": "ml/ai",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id             INTEGER PRIMARY KEY,
+    url                TEXT NOT NULL,
+    title              TEXT,
+    company            TEXT,
+    category           TEXT,
+    salary_min         REAL,                -- USD/month, like salary_mid
+    salary_max         REAL,
+    salary_mid         REAL,
+    experience_months  INTEGER,
+    date_posted        TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_category   ON jobs (category);
+CREATE INDEX IF NOT EXISTS jobs_salary_mid ON jobs (salary_mid);
+CREATE INDEX IF NOT EXISTS jobs_experience ON jobs (experience_months);
+CREATE TABLE IF NOT EXISTS skills (
+    skill   TEXT NOT NULL,
+    job_id  INTEGER NOT NULL,
+    PRIMARY KEY (skill, job_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS skills_job ON skills (job_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS docs USING fts5(
+    title, skills, description,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+
+def normalize_skill(raw: str) -> str:
+    s = re.sub(r"\s+", " ", raw.strip().lower())
+    return SKILL_ALIASES.get(s, s)
+
+
+def job_skills(row: Mapping[str, str]) -> list[str]:
+    """Normalized skills of one row: its skill tags plus its category."""
+    tags = [t for t in (row.get("skills") or "").split(",") if t.strip()]
+    if row.get("category"):
+        tags.append(row["category"])
+    return list(dict.fromkeys(normalize_skill(t) for t in tags))
+
+
+def _num(v: str | None) -> float | None:
+    try:
+        return float(v) if v not in (None, "") else None
+    except ValueError:
+        return None
+
+
+def _salary_usd(row: Mapping[str, str]) -> tuple[float | None, float | None]:
+    """USD/month (min, max): normalized columns if present, else raw USD amounts."""
+    lo, hi = _num(row.get("salary_min_usd")), _num(row.get("salary_max_usd"))
+    if lo is None and hi is None:
+        if (row.get("salary_currency") or "USD").upper() != "USD":
+            return None, None
+        lo, hi = _num(row.get("salary_min")), _num(row.get("salary_max"))
+    return lo, hi
+
+
+def _salary_mid(lo: float | None, hi: float | None) -> float | None:
+    if lo and hi:
+        return (lo + hi) / 2
+    return lo or hi
+
+
+_JOB_COLS = ("url", "title", "company", "category", "salary_min", "salary_max",
+             "salary_mid", "experience_months", "date_posted")
+
+# Upsert: a later row never blanks a column an earlier one filled (same rule as
+# SnapshotStore), so a bare listing stub does not undo a detail fetch.
+_UPSERT_JOB = (
+    f"INSERT INTO jobs (job_id, {', '.join(_JOB_COLS)}) VALUES ({', '.join('?' * (len(_JOB_COLS) + 1))}) "
+    "ON CONFLICT(job_id) DO UPDATE SET "
+    + ", ".join(f"{c} = COALESCE(excluded.{c}, {c})" for c in _JOB_COLS)
+)
+_REPLACE_JOB = (
+    f"INSERT OR REPLACE INTO jobs (job_id, {', '.join(_JOB_COLS)}) "
+    f"VALUES ({', '.join('?' * (len(_JOB_COLS) + 1))})"
+)
+
+
+class SkillIndex:
+    """
+    Incremental writer: add() upserts rows by job id (write() for use as a
+    scraper sink). Empty fields keep what is already indexed; a row's skill
+    tags replace the job's postings only when the row has any. With
+    replace=True a row replaces everything indexed for its job
+    (html_archive.py reparse) — or, if `detailed` is given and lacks its
+    URL, only the job row, which holds listing columns alone; its
+    postings and description are then merged as usual.
+    """
+
+    def __init__(
+        self,
+        path: Path = INDEX_PATH,
+        *,
+        replace: bool = False,
+        detailed: Container[str] | None = None,
+    ) -> None:
+        self.replace  = replace
+        self.detailed = detailed
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(_SCHEMA)
+
+    def add(self, rows: Iterable[Mapping[str, str]]) -> int:
+        n = 0
+        cur = self.conn.cursor()
+        for row in rows:
+            jid = job_id(row.get("url") or "")
+            if jid is None:
+                continue
+            exp = _num(row.get("experience_months"))
+            lo, hi = _salary_usd(row)
+            full   = self.replace and (self.detailed is None or row["url"] in self.detailed)
+            cur.execute(
+                _REPLACE_JOB if self.replace else _UPSERT_JOB,
+                (jid, row["url"], row.get("title") or None, row.get("company") or None,
+                 row.get("category") or None, lo, hi, _salary_mid(lo, hi),
+                 int(exp) if exp is not None else None, row.get("date_posted") or None),
+            )
+            if row.get("skills") or full:
+                cur.execute("DELETE FROM skills WHERE job_id = ?", (jid,))
+            cur.executemany(
+                "INSERT OR IGNORE INTO skills VALUES (?, ?)", [(s, jid) for s in job_skills(row)]
+            )
+
+            # FTS5 has no upsert: merge with the indexed document, then replace it
+            old = ("", "")
+            if not full:
+                old = cur.execute(
+                    "SELECT title, description FROM docs WHERE rowid = ?", (jid,)
+                ).fetchone() or old
+            skills = [s for (s,) in cur.execute("SELECT skill FROM skills WHERE job_id = ?", (jid,))]
+            cur.execute("DELETE FROM docs WHERE rowid = ?", (jid,))
+            cur.execute(
+                "INSERT INTO docs (rowid, title, skills, description) VALUES (?, ?, ?, ?)",
+                (jid, row.get("title") or old[0], " ".join(skills), row.get("description") or old[1]),
+            )
+            n += 1
+        self.conn.commit()
+        return n
+
+    def write(self, rows: Iterable[Mapping[str, str]]) -> None:
+        self.add(rows)
+
+    def close(self) -> None:
+        self.conn.execute("INSERT INTO docs (docs) VALUES ('optimize')")
+        self.conn.commit()
+        self.conn.close()
+
+
+def build(csv_path: Path = DATA_PATH, index_path: Path = INDEX_PATH) -> int:
+    """Rebuild the index from scratch from a djinni.csv file."""
+    index_path.unlink(missing_ok=True)
+    index = SkillIndex(index_path)
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        n = index.add(csv.DictReader(f))
+    index.close()
+    return n
+
+
+# ── Query API ─────────────────────────────────────────────────────────────────
+
+def fts_query(text: str) -> str:
+    """
+    Keywords → FTS5 query: every word becomes a quoted phrase (all must
+    match), so "node.js" or "c++" are searched as text, not FTS5 syntax.
+    A trailing * keeps prefix matching ("kube*").
+    """
+    terms = []
+    for word in text.split():
+        prefix = word.endswith("*") and len(word) > 1
+        phrase = '"' + word.rstrip("*").replace('"', '""') + '"'
+        terms.append(phrase + "*" if prefix else phrase)
+    return " ".join(terms)
+
+
+def query(
+    conn: sqlite3.Connection,
+    *,
+    skills: list[str] = (),
+    text: str | None = None,
+    category: str | None = None,
+    min_salary: float | None = None,
+    max_salary: float | None = None,
+    min_exp: int | None = None,
+    max_exp: int | None = None,
+    limit: int = 50,
+) -> list[sqlite3.Row]:
+    """
+    Jobs having ALL `skills`, containing all keywords of `text`, within the numeric
+    bounds (salary = USD/month midpoint, experience in months).
+    Newest first.
+    """
+    where: list[str] = []
+    params: list = []
+
+    norm = list(dict.fromkeys(normalize_skill(s) for s in skills))
+    if norm:
+        where.append(
+            "j.job_id IN (SELECT job_id FROM skills WHERE skill IN ({}) "
+            "GROUP BY job_id HAVING COUNT(*) = ?)".format(", ".join("?" * len(norm)))
+        )
+        params += [*norm, len(norm)]
+    if text and text.strip("* "):
+        where.append("j.job_id IN (SELECT rowid FROM docs WHERE docs MATCH ?)")
+        params.append(fts_query(text))
+    if category:
+        where.append("j.category = ?")
+        params.append(category)
+    for col, op, val in (
+        ("salary_mid", ">=", min_salary), ("salary_mid", "<=", max_salary),
+        ("experience_months", ">=", min_exp), ("experience_months", "<=", max_exp),
+    ):
+        if val is not None:
+            where.append(f"j.{col} {op} ?")
+            params.append(val)
+
+    sql = (
+        "SELECT j.*, (SELECT group_concat(skill, ', ') FROM skills s "
+        "WHERE s.job_id = j.job_id) AS skills FROM jobs j"
+        + (" WHERE " + " AND ".join(where) if where else "")
+        + " ORDER BY j.date_posted DESC LIMIT ?"
+    )
+    conn.row_factory = sqlite3.Row
+    return conn.execute(sql, [*params, limit]).fetchall()
+
+
+def top_skills(conn: sqlite3.Connection, limit: int = 30) -> list[tuple[str, int]]:
+    return conn.execute(
+        "SELECT skill, COUNT(*) AS n FROM skills GROUP BY skill ORDER BY n DESC LIMIT ?",
+        (limit,),
+    ).fetchall()
+
+
+# ── CLI ───────────────────────────────────────────────────────────────────────
+
+def main() -> None:
+    ap  = argparse.ArgumentParser(description="Skill / keyword index over scraped jobs")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    sub.add_parser("build", help="rebuild the index from data/djinni.csv")
+
+    q = sub.add_parser("query", help="find jobs by skills, keywords and filters")
+    q.add_argument("-s", "--skill", action="append", default=[], help="required skill (repeatable)")
+    q.add_argument("-t", "--text", help="keywords over title, skills and description (all must match; word* = prefix)")
+    q.add_argument("-c", "--category")
+    q.add_argument("--min-salary", type=float)
+    q.add_argument("--max-salary", type=float)
+    q.add_argument("--min-exp", type=int, help="minimum experience, months")
+    q.add_argument("--max-exp", type=int, help="maximum experience, months")
+    q.add_argument("-n", "--limit", type=int, default=50)
+
+    t = sub.add_parser("skills", help="most common skills")
+    t.add_argument("--top", type=int, default=30)
+
+    args = ap.parse_args()
+
+    if args.cmd == "build":
+        started = time.perf_counter()
+        n = build()
+        print(f"Indexed {n:,} jobs into {INDEX_PATH} in {time.perf_counter() - started:.1f}s")
+        return
+
+    if not INDEX_PATH.exists():
+        raise SystemExit(f"No index at {INDEX_PATH} — run `python scripts/skill_index.py build`")
+    conn = sqlite3.connect(f"file:{INDEX_PATH}?mode=ro", uri=True)
+
+    if args.cmd == "skills":
+        for skill, n in top_skills(conn, args.top):
+            print(f"{n:>6,}  {skill}")
+        return
+
+    started = time.perf_counter()
+    rows = query(
+        conn, skills=args.skill, text=args.text, category=args.category,
+        min_salary=args.min_salary, max_salary=args.max_salary,
+        min_exp=args.min_exp, max_exp=args.max_exp, limit=args.limit,
+    )
+    elapsed = (time.perf_counter() - started) * 1000
+    for r in rows:
+        sal = f"${r['salary_mid']:,.0f}" if r["salary_mid"] else "—"
+        print(f"{sal:>8}  {(r['title'] or '')[:50]:<50}  {(r['company'] or '')[:24]:<24}  {r['url']}")
+    print(f"\n{len(rows)} jobs in {elapsed:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,407 @@
+"""
+Djinni.co scrape snapshots — run-stamped, day-partitioned history
+────────────────────────────────────────────────────────────────────
+Every scraper run writes the listings it sees into a SQLite store:
+
+  • one partition table per scrape day   (jobs_YYYYMMDD, keyed by URL)
+  • a `runs` table                       (run_id → partition, row count)
+  • a `partition_stats` table            (per-day aggregates by category / company)
+
+Trend queries (week-over-week demand and salary) read only the
+`partition_stats` rows of the days they cover — the raw partitions are
+never scanned to compute a trend.
+
+Usage:
+  python scripts/snapshots.py                   # WoW trends by category
+  python scripts/snapshots.py --by company --top 30
+  python scripts/snapshots.py --week-end 2026-02-22
+"""
+
+from __future__ import annotations
+
+import argparse
+import sqlite3
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Container
+
+from djinni_schema import LISTING_FIELDS
+
+SNAPSHOT_PATH = Path(__file__).parent.parent / "data" / "snapshots.sqlite"
+
+# Dimensions aggregated into partition_stats
+DIMENSIONS = ("category", "company")
+
+# Same salary sanity bound as generate_charts.py, on the USD/month midpoint
+SALARY_CAP = 30_000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id      TEXT PRIMARY KEY,
+    started_at  TEXT NOT NULL,
+    day         TEXT NOT NULL,
+    rows        INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS partitions (
+    day         TEXT PRIMARY KEY,
+    table_name  TEXT NOT NULL,
+    rows        INTEGER NOT NULL DEFAULT 0,
+    updated_at  TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS partition_stats (
+    day               TEXT NOT NULL,
+    dimension         TEXT NOT NULL,
+    key               TEXT NOT NULL,
+    jobs              INTEGER NOT NULL,
+    salary_jobs       INTEGER NOT NULL,
+    salary_sum        REAL NOT NULL,
+    views_sum         INTEGER NOT NULL,
+    applications_sum  INTEGER NOT NULL,
+    PRIMARY KEY (dimension, day, key)
+);
+"""
+
+
+def partition_name(day: date) -> str:
+    return f"jobs_{day:%Y%m%d}"
+
+
+def _parse_day(value: str) -> date:
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+class SnapshotStore:
+    """
+    Snapshot writer for one scraper run.
+
+    Rows are upserted by URL into today's partition, so re-running the
+    scraper on the same day refreshes the partition instead of duplicating it,
+    and detail-page fields written later in a run enrich the listing row.
+    Call close() at the end of the run to refresh the partition's stats.
+
+    With replace=True a written row overwrites the stored one instead
+    (html_archive.py reparse after a parser fix): every column if its URL
+    is in `detailed` (or `detailed` is None), else only LISTING_FIELDS, so
+    a job whose detail page was not re-parsed keeps its detail columns.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        fields: list[str],
+        *,
+        run_id: str | None = None,
+        day: date | None = None,
+        replace: bool = False,
+        detailed: Container[str] | None = None,
+    ) -> None:
+        now        = datetime.now(timezone.utc)
+        self.path  = path
+        self.fields = list(fields)
+        self.day   = day or now.date()
+        self.run_id = run_id or now.strftime("%Y%m%dT%H%M%SZ")
+        self.table = partition_name(self.day)
+        self.rows  = 0
+        self.detailed = detailed if replace else None
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(_SCHEMA)
+        cols = ", ".join(f'"{f}" TEXT' for f in self.fields if f != "url")
+        self.conn.execute(
+            f'CREATE TABLE IF NOT EXISTS "{self.table}" ('
+            f'url TEXT PRIMARY KEY, run_id TEXT NOT NULL, {cols})'
+        )
+        # Same-day partitions created before a column was added to the schema
+        have = {r[1] for r in self.conn.execute(f'PRAGMA table_info("{self.table}")')}
+        for f in self.fields:
+            if f not in have:
+                self.conn.execute(f'ALTER TABLE "{self.table}" ADD COLUMN "{f}" TEXT')
+        self.conn.execute(
+            "INSERT OR IGNORE INTO runs (run_id, started_at, day) VALUES (?, ?, ?)",
+            (self.run_id, now.isoformat(timespec="seconds"), self.day.isoformat()),
+        )
+        self.conn.commit()
+
+        # Upsert: a later write never blanks a column an earlier one filled,
+        # so a listing pass does not wipe detail fields fetched the same day
+        # (unless replacing).
+        keep = 'excluded."{0}"' if replace else 'COALESCE(NULLIF(excluded."{0}", \'\'), "{0}")'
+        self._insert = self._upsert(keep, self.fields)
+        self._insert_listing = self._upsert(
+            keep, [f for f in self.fields if f in LISTING_FIELDS]
+        )
+
+    def _upsert(self, keep: str, update: list[str]) -> str:
+        """INSERT of every field that, on conflict, sets only `update` (via `keep`)."""
+        return (
+            f'INSERT INTO "{self.table}" (run_id, '
+            + ", ".join(f'"{f}"' for f in self.fields)
+            + ") VALUES (?, "
+            + ", ".join("?" for _ in self.fields)
+            + ") ON CONFLICT(url) DO UPDATE SET run_id = excluded.run_id, "
+            + ", ".join(
+                f'"{f}" = ' + keep.format(f)
+                for f in update if f != "url"
+            )
+        )
+
+    def write(self, rows: list[dict]) -> None:
+        rows = [r for r in rows if r.get("url")]
+        if not rows:
+            return
+        full    = [r for r in rows if self.detailed is None or r["url"] in self.detailed]
+        listing = [r for r in rows if self.detailed is not None and r["url"] not in self.detailed]
+        for sql, batch in ((self._insert, full), (self._insert_listing, listing)):
+            self.conn.executemany(
+                sql,
+                [(self.run_id, *(str(r.get(f, "") or "") for f in self.fields)) for r in batch],
+            )
+        self.conn.commit()
+        self.rows += len(rows)
+
+    def observe(self, rows: list[dict]) -> None:
+        """Listings seen again after a resume: recorded like write()."""
+        self.write(rows)
+
+    def close(self) -> None:
+        """Record run totals, refresh the partition's stats and close."""
+        self.conn.execute(
+            "UPDATE runs SET rows = ? WHERE run_id = ?", (self.rows, self.run_id)
+        )
+        refresh_stats(self.conn, self.day)
+        self.conn.close()
+
+
+def refresh_stats(conn: sqlite3.Connection, day: date) -> None:
+    """Recompute partition_stats and the catalog entry for one day partition."""
+    table = partition_name(day)
+    (total,) = conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()
+
+    conn.execute("DELETE FROM partition_stats WHERE day = ?", (day.isoformat(),))
+    for dim in DIMENSIONS:
+        conn.execute(
+            f"""
+            INSERT INTO partition_stats
+            SELECT ?, ?, key,
+                   COUNT(*),
+                   COUNT(mid),
+                   COALESCE(SUM(mid), 0),
+                   COALESCE(SUM(CAST(NULLIF(views, '') AS INTEGER)), 0),
+                   COALESCE(SUM(CAST(NULLIF(applications, '') AS INTEGER)), 0)
+            FROM (
+                SELECT "{dim}" AS key, views, applications,
+                       CASE WHEN COALESCE(salary_max_usd, '') != '' THEN
+                                 CASE WHEN CAST(salary_min_usd AS REAL) > 0
+                                       AND CAST(salary_max_usd AS REAL) > 0
+                                       AND CAST(salary_max_usd AS REAL) <= {SALARY_CAP}
+                                      THEN (CAST(salary_min_usd AS REAL) + CAST(salary_max_usd AS REAL)) / 2
+                                 END
+                            -- rows written before salary normalization: raw USD only
+                            WHEN salary_currency IN ('', 'USD')
+                             AND CAST(salary_min AS REAL) > 0
+                             AND CAST(salary_max AS REAL) > 0
+                             AND CAST(salary_max AS REAL) <= {SALARY_CAP}
+                            THEN (CAST(salary_min AS REAL) + CAST(salary_max AS REAL)) / 2
+                       END AS mid
+                FROM "{table}"
+                WHERE "{dim}" != ''
+            )
+            GROUP BY key
+            """,
+            (day.isoformat(), dim),
+        )
+    conn.execute(
+        "INSERT OR REPLACE INTO partitions (day, table_name, rows, updated_at) "
+        "VALUES (?, ?, ?, ?)",
+        (day.isoformat(), table, total,
+         datetime.now(timezone.utc).isoformat(timespec="seconds")),
+    )
+    conn.commit()
+
+
+# ── Trend layer ───────────────────────────────────────────────────────────────
+
+def partition_days(conn: sqlite3.Connection, start: date, end: date) -> list[date]:
+    """Catalogued partition days within [start, end]."""
+    return [
+        _parse_day(d) for (d,) in conn.execute(
+            "SELECT day FROM partitions WHERE day BETWEEN ? AND ? ORDER BY day",
+            (start.isoformat(), end.isoformat()),
+        )
+    ]
+
+
+def detail_history(
+    conn: sqlite3.Connection, today: date, lookback_days: int = 28,
+) -> dict[str, tuple[str, str | None, str]]:
+    """
+    What earlier runs saw of each job, from the partitions of the
+    `lookback_days` before `today` and today's own partition, so a second
+    run on the same day sees what the first one fetched. Call it before
+    this run writes to today's partition.
+
+    Returns {url: (first seen day, last day its detail page was fetched
+    or None, date_posted as last seen)}. A row counts as detailed when
+    its `views` column is filled.
+    """
+    days = partition_days(conn, today - timedelta(days=lookback_days),
+                          today - timedelta(days=1))
+    # Today's partition may not be catalogued yet if an earlier run crashed
+    if conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+        (partition_name(today),),
+    ).fetchone():
+        days.append(today)
+    hist: dict[str, tuple[str, str | None, str]] = {}
+    for day in days:                      # ascending, so later days overwrite
+        d = day.isoformat()
+        for url, views, posted in conn.execute(
+            f'SELECT url, views, date_posted FROM "{partition_name(day)}"'
+        ):
+            first, detailed, _ = hist.get(url, (d, None, ""))
+            hist[url] = (first, d if views else detailed, posted)
+    return hist
+
+
+def recent_rows(
+    conn: sqlite3.Connection, today: date, urls, lookback_days: int = 7,
+) -> dict[str, dict[str, str]]:
+    """
+    Latest stored row of each of `urls` over today's partition and the
+    `lookback_days` before it; used to rebuild the detail queue for
+    listing pages a resumed run skips.
+    """
+    days = partition_days(conn, today - timedelta(days=lookback_days),
+                          today - timedelta(days=1))
+    if conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+        (partition_name(today),),
+    ).fetchone():
+        days.append(today)
+    rows: dict[str, dict[str, str]] = {}
+    for day in days:                      # ascending, so later days overwrite
+        cur = conn.execute(f'SELECT * FROM "{partition_name(day)}"')
+        cols = [c[0] for c in cur.description]
+        for values in cur:
+            row = dict(zip(cols, values))
+            if row["url"] in urls:
+                row.pop("run_id", None)
+                rows[row["url"]] = {k: v or "" for k, v in row.items()}
+    return rows
+
+
+def _week_stats(
+    conn: sqlite3.Connection, dimension: str, start: date, end: date,
+) -> tuple[dict[str, tuple[float, float | None]], int]:
+    """
+    Aggregate partition_stats over [start, end].
+    Returns ({key: (avg daily listings, mean salary mid)}, partitions covered).
+    """
+    days = partition_days(conn, start, end)
+    if not days:
+        return {}, 0
+    out: dict[str, tuple[float, float | None]] = {}
+    for key, jobs, sal_n, sal_sum in conn.execute(
+        """
+        SELECT key, SUM(jobs), SUM(salary_jobs), SUM(salary_sum)
+        FROM partition_stats
+        WHERE dimension = ? AND day BETWEEN ? AND ?
+        GROUP BY key
+        """,
+        (dimension, start.isoformat(), end.isoformat()),
+    ):
+        out[key] = (jobs / len(days), sal_sum / sal_n if sal_n else None)
+    return out, len(days)
+
+
+def _pct(curr: float | None, prev: float | None) -> float | None:
+    if curr is None or not prev:
+        return None
+    return (curr - prev) / prev * 100
+
+
+def weekly_trends(
+    conn: sqlite3.Connection,
+    dimension: str = "category",
+    week_end: date | None = None,
+) -> list[dict]:
+    """
+    Week-over-week demand and salary change per `dimension` key.
+
+    Demand is average daily active listings across the week's partitions;
+    salary is the mean salary midpoint (USD/month) of listings that disclose it.
+    The current week is the 7 days ending at `week_end` (default: latest partition).
+    """
+    if dimension not in DIMENSIONS:
+        raise ValueError(f"dimension must be one of {DIMENSIONS}, got {dimension!r}")
+    if week_end is None:
+        (latest,) = conn.execute("SELECT MAX(day) FROM partitions").fetchone()
+        if latest is None:
+            return []
+        week_end = _parse_day(latest)
+
+    curr_start = week_end - timedelta(days=6)
+    prev_end   = curr_start - timedelta(days=1)
+    prev_start = prev_end - timedelta(days=6)
+
+    curr, _ = _week_stats(conn, dimension, curr_start, week_end)
+    prev, _ = _week_stats(conn, dimension, prev_start, prev_end)
+
+    trends: list[dict] = []
+    for key in curr.keys() | prev.keys():
+        d_curr, s_curr = curr.get(key, (0.0, None))
+        d_prev, s_prev = prev.get(key, (0.0, None))
+        trends.append({
+            dimension:           key,
+            "demand_prev":       round(d_prev, 1),
+            "demand_curr":       round(d_curr, 1),
+            "demand_change_pct": _pct(d_curr, d_prev),
+            "salary_prev":       s_prev,
+            "salary_curr":       s_curr,
+            "salary_change_pct": _pct(s_curr, s_prev),
+        })
+    trends.sort(key=lambda t: t["demand_curr"], reverse=True)
+    return trends
+
+
+def open_store(path: Path = SNAPSHOT_PATH) -> sqlite3.Connection:
+    """Open an existing snapshot store read-only."""
+    return sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+
+
+# ── CLI ───────────────────────────────────────────────────────────────────────
+
+def _fmt(v: float | None, spec: str) -> str:
+    return format(v, spec) if v is not None else "—"
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Week-over-week trends from scrape snapshots")
+    ap.add_argument("--by", choices=DIMENSIONS, default="category")
+    ap.add_argument("--top", type=int, default=20)
+    ap.add_argument("--week-end", type=_parse_day, default=None,
+                    help="last day of the current week (YYYY-MM-DD)")
+    ap.add_argument("--db", type=Path, default=SNAPSHOT_PATH)
+    args = ap.parse_args()
+
+    if not args.db.exists():
+        raise SystemExit(f"No snapshot store at {args.db} — run scripts/djinni.py first")
+
+    conn = open_store(args.db)
+    trends = weekly_trends(conn, args.by, args.week_end)[: args.top]
+    conn.close()
+
+    print(f"{args.by:<32} {'demand':>15} {'Δ%':>7} {'salary':>17} {'Δ%':>7}")
+    for t in trends:
+        print(
+            f"{str(t[args.by])[:32]:<32} "
+            f"{t['demand_prev']:>7.1f}→{t['demand_curr']:<7.1f} "
+            f"{_fmt(t['demand_change_pct'], '+.1f'):>7} "
+            f"{_fmt(t['salary_prev'], ',.0f'):>8}→{_fmt(t['salary_curr'], ',.0f'):<8} "
+            f"{_fmt(t['salary_change_pct'], '+.1f'):>7}"
+        )
+
+
+if __name__ == "__main__":
+    main()